@@ -1,51 +1,51 @@
 """
 Propósito: Inicializa la aplicación Flask y configura sus componentes principales.
 Funcionalidad: Define la función create_app() que crea la instancia de Flask, carga 
-configuraciones desde .env a través de config.py, inicializa extensiones como CORS y JWT, 
+configuraciones (.env se lee una sola vez en config.py), inicializa extensiones como CORS y JWT, 
+configura el logging estructurado, crea el pool de conexiones MySQL, las cachés, el ejecutor
+de trabajos y el limitador de intentos de login,
 configura la clave secreta y registra los Blueprints de categorías, productos, 
-documentación y autenticación.
+documentación, autenticación, trabajos en segundo plano y salud (/health).
 """
 
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager  # Importa JWTManager
-from dotenv import load_dotenv
-import os
-from pathlib import Path
 
-from .config import Config
+from .config import Config, ENV_PATH
+from . import db, logs, estadisticas, cache_categorias, propagacion, trabajos, limite_login, cache_respuestas, calentamiento
 from .blueprints.categoria import categoria_bp
 from .blueprints.producto import producto_bp
 from .blueprints.documentacion import documentacion_bp
 from .blueprints.auth import auth_bp
 from .blueprints.usuario import usuario_bp
+from .blueprints.trabajos import trabajos_bp
+from .blueprints.salud import salud_bp
 
 cors = CORS(resources={r"/*": {"origins": "*"}})  # Permite todos los orígenes
 jwt = JWTManager()  # Instancia global de JWTManager
 
 def create_app():
     
-    env_path = Path('.') / '.env'
-    print(f"Buscando .env en: {env_path.absolute()}")  # Debug
-    load_dotenv(env_path)
     app = Flask(__name__)
+    # La configuración (incluido .env y la clave secreta/JWT) se resolvió una vez al importar config.py
     app.config.from_object(Config)
-    
-    print("!CONFIGURACIÓN CARGADA!")  # Debug
-    print(f"DB_HOST: {os.getenv('MYSQL_HOST')}")  # Debug
-    
-    app.config['JWT_SECRET_KEY'] = os.getenv('SECRET_KEY', 'Yeicy')
-    app.config['JWT_TOKEN_LOCATION'] = ['headers']
-    # Configura la clave secreta de la aplicación
-    app.secret_key = app.config['SECRET_KEY']
-    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 3600  # 1 hora
 
-    # Configura la clave secreta de la aplicación
-    app.secret_key = app.config['JWT_SECRET_KEY']
+    # Logging no bloqueante (JSON vía QueueHandler/QueueListener)
+    logs.init_app(app)
+    app.logger.debug("Configuración cargada desde %s (DB_HOST: %s)", ENV_PATH.absolute(), app.config['MYSQL_HOST'])
 
     # Inicializa extensiones
     cors.init_app(app)
     jwt.init_app(app)  # Inicializa JWTManager
+    db.init_app(app)  # Pool de conexiones MySQL compartido por los Blueprints
+    estadisticas.init_app(app)  # Comando `flask stats rebuild`
+    cache_categorias.init_app(app)  # Caché de nombres de categoría
+    cache_respuestas.init_app(app)  # Caché de respuestas GET serializadas
+    propagacion.init_app(app)  # Comando `flask categorias sync-nombres`
+    trabajos.init_app(app)  # Trabajos en segundo plano y comando `flask trabajos init`
+    limite_login.init_app(app)  # Límite de intentos de inicio de sesión
+    calentamiento.init_app(app)  # Pool, caché de categorías y swagger antes de /health/ready
 
     # Registra Blueprints
     app.register_blueprint(categoria_bp, url_prefix='/categorias')
@@ -53,5 +53,7 @@ def create_app():
     app.register_blueprint(documentacion_bp, url_prefix='/documentacion')
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(usuario_bp, url_prefix='/usuarios')
+    app.register_blueprint(trabajos_bp, url_prefix='/trabajos')
+    app.register_blueprint(salud_bp, url_prefix='/health')
 
     return app
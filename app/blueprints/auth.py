@@ -2,32 +2,21 @@
 Propósito: Define rutas para autenticación de usuarios (inicio de sesión, registro y verificación).
 Funcionalidad: Proporciona endpoints /login, /register y /me para autenticar, registrar y 
 obtener información del usuario autenticado usando JWT. Valida campos, hashea contraseñas con bcrypt 
-y genera/verifica tokens JWT.
+y genera/verifica tokens JWT. /login limita los intentos por número e IP (ver limite_login.py).
 """
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 import pymysql.cursors
-import bcrypt
 import re
 
+from ..db import get_db_connection
+from ..hashing import hash_password, check_password
+from ..limite_login import verificar_intento, login_correcto
+
 # Crea el Blueprint para autenticación
 auth_bp = Blueprint('auth', __name__)
 
-def get_db_connection():
-    """
-    Establece una conexión a la base de datos MySQL usando configuraciones de la app.
-    """
-    return pymysql.connect(
-        host=current_app.config['MYSQL_HOST'],
-        user=current_app.config['MYSQL_USER'],
-        password=current_app.config['MYSQL_PASSWORD'],
-        database=current_app.config['MYSQL_DATABASE'],
-        port=int(current_app.config['MYSQL_PORT']),
-        cursorclass=pymysql.cursors.DictCursor,
-        connect_timeout=5
-    )
-
 def validate_password(password):
     """Valida que la contraseña cumpla con los requisitos mínimos"""
     if len(password) < 6:
@@ -47,6 +36,16 @@ def login():
     if not numero or not contrasena:
         return jsonify({"error": "Número y contraseña son requeridos"}), 400
 
+    # Límite de intentos: se rechaza antes de consultar MySQL o calcular bcrypt
+    espera = verificar_intento(numero)
+    if espera:
+        response = jsonify({
+            "error": f"Demasiados intentos de inicio de sesión; intente de nuevo en {espera} s"
+        })
+        response.headers['Retry-After'] = str(espera)
+        return response, 429
+
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -58,7 +57,8 @@ def login():
                 return jsonify({"error": "Usuario no encontrado"}), 404
             
             # Verifica la contraseña
-            if bcrypt.checkpw(contrasena.encode('utf-8'), usuario['contrasena'].encode('utf-8')):
+            if check_password(contrasena, usuario['contrasena']):
+                login_correcto(numero)
                 access_token = create_access_token(identity=str(usuario['id']))
                 return jsonify({
                     "message": "Inicio de sesión exitoso",
@@ -73,10 +73,11 @@ def login():
             else:
                 return jsonify({"error": "Credenciales inválidas"}), 401
     except pymysql.Error as err:
-        current_app.logger.error(f"Error en login: {str(err)}")
+        current_app.logger.error("Error en login: %s", err)
         return jsonify({"error": "Error al procesar el inicio de sesión"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -98,6 +99,7 @@ def register():
             "error": "La contraseña debe tener al menos 6 caracteres"
         }), 400
 
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -107,7 +109,7 @@ def register():
                 return jsonify({"error": "El número ya está registrado"}), 409
 
             # Hashea la contraseña
-            hashed_password = bcrypt.hashpw(contrasena.encode('utf-8'), bcrypt.gensalt())
+            hashed_password = hash_password(contrasena)
 
             # Inserta el nuevo usuario
             cursor.execute(
@@ -133,7 +135,8 @@ def register():
                 }
             }), 201
     except pymysql.Error as err:
-        current_app.logger.error(f"Error en registro: {str(err)}")
+        current_app.logger.error("Error en registro: %s", err)
         return jsonify({"error": "Error al registrar el usuario"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
@@ -3,62 +3,114 @@ Propósito: Contiene las rutas y lógica para las operaciones CRUD de la tabla c
 Funcionalidad: Define un Blueprint (categoria_bp) que agrupa las rutas relacionadas con 
 categorías (/categorias, /categorias/<id>). Incluye funciones para obtener todas las categorías, 
 obtener una categoría específica, crear, actualizar y eliminar categorías, con manejo de errores
-y conexión a la base de datos usando PyMySQL.
+y conexión a la base de datos usando PyMySQL. También expone las estadísticas por categoría
+(/categorias/stats, /categorias/<id>/stats) leídas del resumen incremental de estadisticas.py.
+Los renombres y eliminaciones se propagan a productos por lotes (ver propagacion.py), como
+trabajo en segundo plano cuando JOBS_HABILITADOS está activo. Las rutas GET aceptan ?fields=
+y sus respuestas se cachean (ver cache_respuestas.py).
 """
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 import pymysql.cursors
 
+from ..db import get_db_connection, leer_compartido
+from .. import estadisticas, propagacion, trabajos
+from ..cache_categorias import get_cache
+from ..cache_respuestas import cachear, publicar
+from ..campos import (CAMPOS_CATEGORIA, CAMPOS_CATEGORIA_STATS, CamposInvalidos,
+                      campos_solicitados, lista_select)
+
 # Crea un Blueprint llamado 'categoria'
 categoria_bp = Blueprint('categoria', __name__)
 
-def get_db_connection():
-    """Establece una conexión a la base de datos MySQL usando PyMySQL"""
-    return pymysql.connect(
-        host=current_app.config['MYSQL_HOST'],
-        user=current_app.config['MYSQL_USER'],
-        password=current_app.config['MYSQL_PASSWORD'],
-        database=current_app.config['MYSQL_DATABASE'],
-        port=int(current_app.config['MYSQL_PORT']),
-        cursorclass=pymysql.cursors.DictCursor,
-        connect_timeout=5
-    )
-
 @categoria_bp.route('/', methods=['GET'])
 @jwt_required()
+@cachear('categorias')
 def get_categorias():
-    """Obtiene todas las categorías"""
+    """Obtiene todas las categorías (?fields= limita las columnas devueltas)"""
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM categoria")
-            categorias = cursor.fetchall()
-            return jsonify(categorias)
+        campos = campos_solicitados(CAMPOS_CATEGORIA)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Las peticiones concurrentes idénticas comparten la consulta (ver db.leer_compartido)
+        categorias = leer_compartido(f"SELECT {lista_select(campos)} FROM categoria")
+        return jsonify(categorias)
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al obtener categorías: {str(err)}")
+        current_app.logger.error("Error al obtener categorías: %s", err)
         return jsonify({"error": "Error al obtener categorías"}), 500
-    finally:
-        connection.close()
 
 @categoria_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@cachear('categoria:{id}')
 def get_categoria(id):
-    """Obtiene una categoría específica por ID"""
+    """Obtiene una categoría específica por ID (?fields= limita las columnas devueltas)"""
+    try:
+        campos = campos_solicitados(CAMPOS_CATEGORIA)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        categoria = leer_compartido(
+            f"SELECT {lista_select(campos)} FROM categoria WHERE id = %s", (id,), uno=True
+        )
+
+        if categoria:
+            return jsonify(categoria)
+        return jsonify({"error": "Categoría no encontrada"}), 404
+    except pymysql.Error as err:
+        current_app.logger.error("Error al obtener categoría %s: %s", id, err)
+        return jsonify({"error": "Error al obtener la categoría"}), 500
+
+@categoria_bp.route('/stats', methods=['GET'])
+@jwt_required()
+@cachear('categorias_stats')
+def get_categorias_stats():
+    """Obtiene número de productos, precio mínimo/promedio/máximo y últimos productos por categoría"""
+    try:
+        campos = campos_solicitados(CAMPOS_CATEGORIA_STATS)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM categoria WHERE id = %s", (id,))
-            categoria = cursor.fetchone()
-            
-            if categoria:
-                return jsonify(categoria)
+            return jsonify(estadisticas.obtener_todas(cursor, campos))
+    except pymysql.Error as err:
+        current_app.logger.error("Error al obtener estadísticas de categorías: %s", err)
+        return jsonify({"error": "Error al obtener las estadísticas"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+
+@categoria_bp.route('/<int:id>/stats', methods=['GET'])
+@jwt_required()
+@cachear('categorias_stats')
+def get_categoria_stats(id):
+    """Obtiene las estadísticas de productos de una categoría específica"""
+    try:
+        campos = campos_solicitados(CAMPOS_CATEGORIA_STATS)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            stats = estadisticas.obtener(cursor, id, campos)
+
+            if stats:
+                return jsonify(stats)
             return jsonify({"error": "Categoría no encontrada"}), 404
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al obtener categoría {id}: {str(err)}")
-        return jsonify({"error": "Error al obtener la categoría"}), 500
+        current_app.logger.error("Error al obtener estadísticas de categoría %s: %s", id, err)
+        return jsonify({"error": "Error al obtener las estadísticas"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @categoria_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -70,6 +122,7 @@ def create_categoria():
     if not nombre:
         return jsonify({"error": "El nombre es requerido"}), 400
     
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -79,6 +132,8 @@ def create_categoria():
             )
             connection.commit()
             categoria_id = cursor.lastrowid
+            get_cache().invalidar()
+            publicar('categorias', 'categorias_stats')
             
             return jsonify({
                 "message": "Categoría creada exitosamente",
@@ -88,10 +143,11 @@ def create_categoria():
                 }
             }), 201
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al crear categoría: {str(err)}")
+        current_app.logger.error("Error al crear categoría: %s", err)
         return jsonify({"error": "Error al crear la categoría"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @categoria_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
@@ -103,6 +159,7 @@ def update_categoria(id):
     if not nombre:
         return jsonify({"error": "El nombre es requerido"}), 400
     
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -110,41 +167,90 @@ def update_categoria(id):
                 "UPDATE categoria SET nombre = %s WHERE id = %s",
                 (nombre, id)
             )
+            actualizadas = cursor.rowcount
+            # El trabajo de propagación se confirma en la misma transacción que el cambio
+            propagar = actualizadas > 0 and propagacion.copia_activa()
+            trabajo = _encolar(cursor, id) if propagar else None
             connection.commit()
             
-            if cursor.rowcount == 0:
+            if actualizadas == 0:
                 return jsonify({"error": "Categoría no encontrada"}), 404
-                
-            return jsonify({
+
+            get_cache().invalidar()
+            # El nombre aparece también en las estadísticas y en los productos de la categoría
+            publicar('categorias', f'categoria:{id}', 'categorias_stats', 'productos', 'producto')
+            # Propaga el nuevo nombre a la copia guardada en productos, por lotes
+            respuesta = {
                 "message": "Categoría actualizada exitosamente",
                 "categoria": {
                     "id": id,
                     "nombre": nombre
                 }
-            })
+            }
+            if propagar:
+                respuesta.update(_propagar(connection, trabajo, id, propagacion.propagar_renombre, nombre))
+
+            return jsonify(respuesta)
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al actualizar categoría {id}: {str(err)}")
+        current_app.logger.error("Error al actualizar categoría %s: %s", id, err)
         return jsonify({"error": "Error al actualizar la categoría"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @categoria_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_categoria(id):
     """Elimina una categoría"""
     
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
             cursor.execute("DELETE FROM categoria WHERE id = %s", (id,))
+            eliminadas = cursor.rowcount
+            estadisticas.eliminar_categoria(cursor, id)
+            trabajo = _encolar(cursor, id) if eliminadas else None
             connection.commit()
             
-            if cursor.rowcount == 0:
+            if eliminadas == 0:
                 return jsonify({"error": "Categoría no encontrada"}), 404
-                
-            return jsonify({"message": "Categoría eliminada exitosamente"})
+
+            get_cache().invalidar()
+            publicar('categorias', f'categoria:{id}', 'categorias_stats', 'productos', 'producto')
+            # Con la categoría ya eliminada ningún producto nuevo puede referenciarla;
+            # se desvinculan los existentes por lotes para no dejar referencias colgantes
+            respuesta = {"message": "Categoría eliminada exitosamente"}
+            respuesta.update(_propagar(connection, trabajo, id, propagacion.desvincular_productos))
+
+            return jsonify(respuesta)
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al eliminar categoría {id}: {str(err)}")
+        current_app.logger.error("Error al eliminar categoría %s: %s", id, err)
         return jsonify({"error": "Error al eliminar la categoría"}), 500
     finally:
-        connection.close()
\ No newline at end of file
+        if connection is not None:
+            connection.close()
+
+def _encolar(cursor, id):
+    """
+    Con JOBS_HABILITADOS encola la propagación a productos dentro de la transacción en curso,
+    para que se confirme junto con el cambio de la categoría. Devuelve el trabajo o None.
+    """
+    if not current_app.config['JOBS_HABILITADOS']:
+        return None
+    trabajo, _ = trabajos.enviar(cursor, 'propagar_categoria', {"categoria_id": id})
+    return trabajo
+
+def _propagar(connection, trabajo, id, funcion, *args):
+    """
+    Devuelve los campos a agregar a la respuesta: el trabajo ya encolado o, si los trabajos
+    están deshabilitados, el resultado de ejecutar la propagación en la petición.
+    """
+    if trabajo is not None:
+        # El trabajo vuelve a publicar 'productos' y 'producto' al terminar
+        return {"trabajo": trabajo}
+    try:
+        return {"productos_actualizados": funcion(connection, id, *args)}
+    finally:
+        # Una lectura hecha durante la propagación pudo cachear la copia anterior del nombre
+        publicar('productos', 'producto')
@@ -1,14 +1,23 @@
-from flask import send_from_directory, render_template_string, Blueprint
+from flask import send_from_directory, render_template_string, Blueprint, current_app
 import os
 
 documentacion_bp = Blueprint('documentacion', __name__)
 
 # http://127.0.0.1:5000/documentacion/docs
 
+def cargar_spec():
+    """Lee swagger.json en memoria (lo llama el calentamiento del worker)"""
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    with open(os.path.join(root_dir, 'swagger.json'), 'rb') as archivo:
+        current_app.extensions['swagger_spec'] = archivo.read()
+
 @documentacion_bp.route('/swagger.json')
 def swagger_json():
+    spec = current_app.extensions.get('swagger_spec')
+    if spec is not None:
+        return current_app.response_class(spec, mimetype='application/json')
     root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    print(f"Intentando servir swagger.json desde: {os.path.join(root_dir, 'swagger.json')}")  # Depuración
+    current_app.logger.debug("Sirviendo swagger.json desde: %s", root_dir)
     if not os.path.exists(os.path.join(root_dir, 'swagger.json')):
         return {"error": "Archivo swagger.json no encontrado"}, 404
     return send_from_directory(root_dir, 'swagger.json')
@@ -2,62 +2,89 @@
 Propósito: Contiene las rutas y lógica para las operaciones CRUD de la tabla productos.
 Funcionalidad: Define un Blueprint (producto_bp) que agrupa las rutas relacionadas 
 con productos (/productos, /productos/<id>). Incluye funciones para obtener todos los productos, 
-obtener un producto específico, crear, actualizar y eliminar productos.
+obtener un producto específico, crear, actualizar y eliminar productos. Según
+NOMBRE_CATEGORIA_MODO, nombre_categoria se guarda como copia o se resuelve al leer.
+/productos/import carga productos en masa desde CSV o NDJSON (ver importacion.py).
+Las rutas GET aceptan ?fields= para leer sólo las columnas pedidas (ver campos.py) y sus
+respuestas se cachean hasta que una escritura publica la etiqueta (ver cache_respuestas.py).
 """
 
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 import pymysql.cursors
+import os
+import shutil
+import uuid
+
+from ..db import get_db_connection, leer_compartido
+from .. import estadisticas, importacion, propagacion, trabajos
+from ..cache_categorias import resolver_nombres
+from ..cache_respuestas import cachear, publicar
+from ..campos import CAMPOS_PRODUCTO, CamposInvalidos, campos_solicitados, lista_select
 
 # Crea un Blueprint llamado 'producto'
 producto_bp = Blueprint('producto', __name__)
 
-def get_db_connection():
-    """Establece una conexión a la base de datos MySQL usando PyMySQL"""
-    return pymysql.connect(
-        host=current_app.config['MYSQL_HOST'],
-        user=current_app.config['MYSQL_USER'],
-        password=current_app.config['MYSQL_PASSWORD'],
-        database=current_app.config['MYSQL_DATABASE'],
-        port=int(current_app.config['MYSQL_PORT']),
-        cursorclass=pymysql.cursors.DictCursor,
-        connect_timeout=5
-    )
+def _columnas_producto(campos):
+    """Columnas a leer para los campos pedidos; en modo 'lectura' nombre_categoria sale de categoria_id"""
+    if propagacion.copia_activa() or 'nombre_categoria' not in campos:
+        return campos
+    columnas = [campo for campo in campos if campo != 'nombre_categoria']
+    if 'categoria_id' not in columnas:
+        columnas.append('categoria_id')
+    return columnas
+
+def _completar_productos(productos, campos, cursor=None):
+    """Resuelve nombre_categoria en modo 'lectura' y quita las columnas auxiliares"""
+    if propagacion.copia_activa() or 'nombre_categoria' not in campos:
+        return productos
+    resolver_nombres(productos, cursor)
+    if 'categoria_id' not in campos:
+        for producto in productos:
+            del producto['categoria_id']
+    return productos
 
 @producto_bp.route('/', methods=['GET'])
 @jwt_required()
+@cachear('productos')
 def get_productos():
-    """Obtiene todos los productos"""
+    """Obtiene todos los productos (?fields= limita las columnas devueltas)"""
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM productos")
-            productos = cursor.fetchall()
-            return jsonify(productos)
+        campos = campos_solicitados(CAMPOS_PRODUCTO)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Las peticiones concurrentes idénticas comparten la consulta (ver db.leer_compartido)
+        productos = leer_compartido(f"SELECT {lista_select(_columnas_producto(campos))} FROM productos")
+        return jsonify(_completar_productos(productos, campos))
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al obtener productos: {str(err)}")
+        current_app.logger.error("Error al obtener productos: %s", err)
         return jsonify({"error": "Error al obtener los productos"}), 500
-    finally:
-        connection.close()
 
 @producto_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
+@cachear('producto', 'producto:{id}')
 def get_producto(id):
-    """Obtiene un producto específico por ID"""
+    """Obtiene un producto específico por ID (?fields= limita las columnas devueltas)"""
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM productos WHERE id = %s", (id,))
-            producto = cursor.fetchone()
-            
-            if producto:
-                return jsonify(producto)
-            return jsonify({"error": "Producto no encontrado"}), 404
+        campos = campos_solicitados(CAMPOS_PRODUCTO)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        producto = leer_compartido(
+            f"SELECT {lista_select(_columnas_producto(campos))} FROM productos WHERE id = %s",
+            (id,), uno=True
+        )
+
+        if producto:
+            _completar_productos([producto], campos)
+            return jsonify(producto)
+        return jsonify({"error": "Producto no encontrado"}), 404
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al obtener producto {id}: {str(err)}")
+        current_app.logger.error("Error al obtener producto %s: %s", id, err)
         return jsonify({"error": "Error al obtener el producto"}), 500
-    finally:
-        connection.close()
 
 @producto_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -83,6 +110,7 @@ def create_producto():
     except (ValueError, TypeError) as e:
         return jsonify({"error": f"Datos inválidos: {str(e)}"}), 400
 
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -98,10 +126,17 @@ def create_producto():
                 """INSERT INTO productos 
                 (nombre, precio, descripcion, categoria_id, nombre_categoria) 
                 VALUES (%s, %s, %s, %s, %s)""",
-                (nombre, precio, descripcion, categoria_id, nombre_categoria)
+                (nombre, precio, descripcion, categoria_id,
+                 nombre_categoria if propagacion.copia_activa() else '')
             )
-            connection.commit()
             producto_id = cursor.lastrowid
+
+            # Actualiza el resumen de la categoría en la misma transacción
+            estadisticas.registrar_alta(cursor, {
+                "id": producto_id, "nombre": nombre, "precio": precio, "categoria_id": categoria_id
+            })
+            connection.commit()
+            publicar('productos', 'categorias_stats')
             
             return jsonify({
                 "message": "Producto creado exitosamente",
@@ -115,10 +150,11 @@ def create_producto():
                 }
             }), 201
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al crear producto: {str(err)}")
+        current_app.logger.error("Error al crear producto: %s", err)
         return jsonify({"error": "Error al crear el producto"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @producto_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
@@ -144,6 +180,7 @@ def update_producto(id):
     except (ValueError, TypeError) as e:
         return jsonify({"error": f"Datos inválidos: {str(e)}"}), 400
 
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -155,6 +192,15 @@ def update_producto(id):
                     return jsonify({"error": "Categoría no encontrada"}), 400
                 nombre_categoria = cat['nombre']
 
+            # Bloquea la fila actual para conocer precio y categoría anteriores
+            cursor.execute(
+                "SELECT id, nombre, precio, categoria_id FROM productos WHERE id = %s FOR UPDATE",
+                (id,)
+            )
+            anterior = cursor.fetchone()
+            if not anterior:
+                return jsonify({"error": "Producto no encontrado"}), 404
+
             cursor.execute(
                 """UPDATE productos SET 
                 nombre = %s, 
@@ -163,12 +209,14 @@ def update_producto(id):
                 categoria_id = %s, 
                 nombre_categoria = %s 
                 WHERE id = %s""",
-                (nombre, precio, descripcion, categoria_id, nombre_categoria, id)
+                (nombre, precio, descripcion, categoria_id,
+                 nombre_categoria if propagacion.copia_activa() else '', id)
             )
+            estadisticas.registrar_cambio(cursor, anterior, {
+                "id": id, "nombre": nombre, "precio": precio, "categoria_id": categoria_id
+            })
             connection.commit()
-            
-            if cursor.rowcount == 0:
-                return jsonify({"error": "Producto no encontrado"}), 404
+            publicar('productos', f'producto:{id}', 'categorias_stats')
                 
             return jsonify({
                 "message": "Producto actualizado exitosamente",
@@ -182,27 +230,113 @@ def update_producto(id):
                 }
             })
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al actualizar producto {id}: {str(err)}")
+        current_app.logger.error("Error al actualizar producto %s: %s", id, err)
         return jsonify({"error": "Error al actualizar el producto"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @producto_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_producto(id):
     """Elimina un producto"""
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, nombre, precio, categoria_id FROM productos WHERE id = %s FOR UPDATE",
+                (id,)
+            )
+            producto = cursor.fetchone()
+            if not producto:
+                return jsonify({"error": "Producto no encontrado"}), 404
+
             cursor.execute("DELETE FROM productos WHERE id = %s", (id,))
+            estadisticas.registrar_baja(cursor, producto)
             connection.commit()
-            
-            if cursor.rowcount == 0:
-                return jsonify({"error": "Producto no encontrado"}), 404
+            publicar('productos', f'producto:{id}', 'categorias_stats')
                 
             return jsonify({"message": "Producto eliminado exitosamente"})
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al eliminar producto {id}: {str(err)}")
+        current_app.logger.error("Error al eliminar producto %s: %s", id, err)
         return jsonify({"error": "Error al eliminar el producto"}), 500
     finally:
-        connection.close()
\ No newline at end of file
+        if connection is not None:
+            connection.close()
+
+@producto_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_productos():
+    """
+    Importa productos en masa desde CSV o NDJSON.
+    El archivo puede enviarse como cuerpo de la petición (Content-Type text/csv o
+    application/x-ndjson) o como campo 'archivo' de un formulario multipart; el formato
+    también puede indicarse con ?formato=csv|ndjson. Con ?async=true el archivo se guarda
+    en disco y se importa como trabajo en segundo plano (respuesta 202 con el trabajo).
+    """
+    archivo = request.files.get('archivo') if request.mimetype == 'multipart/form-data' else None
+    content_type = archivo.mimetype if archivo else request.mimetype
+    formato = importacion.detectar_formato(content_type, request.args.get('formato'))
+    if not formato:
+        return jsonify({"error": "Formato no soportado; use csv o ndjson"}), 400
+
+    try:
+        tamano_lote = request.args.get('lote', type=int)
+        if tamano_lote is not None and tamano_lote < 1:
+            raise ValueError("lote debe ser mayor que 0")
+    except ValueError as e:
+        return jsonify({"error": f"Datos inválidos: {str(e)}"}), 400
+
+    stream = archivo.stream if archivo else request.stream
+    if request.args.get('async', '').lower() in ('1', 'true'):
+        return _import_productos_async(stream, formato, tamano_lote)
+
+    texto = importacion.abrir_texto(stream)
+    connection = None
+    try:
+        connection = get_db_connection()
+        resultado = importacion.importar(connection, texto, formato, tamano_lote)
+    except pymysql.Error as err:
+        current_app.logger.error("Error al importar productos: %s", err)
+        return jsonify({"error": "Error al importar los productos"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+
+    # Los lotes ya confirmados son visibles aunque la importación se haya interrumpido
+    publicar('productos', 'categorias_stats')
+    if resultado.interrumpida:
+        return jsonify(resultado.to_dict()), 500
+    return jsonify(resultado.to_dict())
+
+def _import_productos_async(stream, formato, tamano_lote):
+    """Copia el archivo a disco por bloques y encola su importación como trabajo"""
+    ruta = os.path.join(trabajos.directorio_archivos(), f"import_{uuid.uuid4().hex}.{formato}")
+    with open(ruta, 'wb') as destino:
+        shutil.copyfileobj(stream, destino, 1024 * 1024)
+
+    creado = False
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            trabajo, creado = trabajos.enviar(
+                cursor, 'importar_productos',
+                {"ruta": ruta, "formato": formato, "lote": tamano_lote},
+                clave=request.headers.get('Idempotency-Key'),
+                creado_por=get_jwt_identity()
+            )
+            connection.commit()
+            return jsonify({"trabajo": trabajo}), 202 if creado else 200
+    except trabajos.TipoTrabajoInvalido as e:
+        return jsonify({"error": str(e)}), 409
+    except pymysql.Error as err:
+        current_app.logger.error("Error al encolar importación de productos: %s", err)
+        return jsonify({"error": "Error al importar los productos"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+        if not creado:
+            # Reintento idempotente o error: el trabajo existente ya tiene su propio archivo
+            os.remove(ruta)
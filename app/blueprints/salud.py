@@ -0,0 +1,53 @@
+"""
+Propósito: Contiene las rutas de salud que consulta la plataforma antes de enviar tráfico.
+Funcionalidad: Define un Blueprint (salud_bp) con /health/live, que sólo confirma que el proceso
+responde, y /health/ready, que responde 200 únicamente cuando el calentamiento del worker
+terminó (tablas auxiliares creadas, pool con sus conexiones mínimas, caché de categorías y
+swagger.json cargados) y MySQL responde a un SELECT 1, cuya latencia se reporta en db_ms.
+En otro caso responde 503.
+"""
+
+import time
+
+from flask import Blueprint, jsonify, current_app
+import pymysql.cursors
+
+from ..db import get_pool
+from ..calentamiento import get_calentamiento
+
+# Crea un Blueprint llamado 'salud'
+salud_bp = Blueprint('salud', __name__)
+
+@salud_bp.route('/live', methods=['GET'])
+def live():
+    """Liveness: el proceso está vivo y atiende peticiones"""
+    return jsonify({"estado": "vivo"})
+
+@salud_bp.route('/ready', methods=['GET'])
+def ready():
+    """Readiness: el worker terminó su calentamiento y llega a MySQL"""
+    calentamiento = get_calentamiento()
+    # Reintenta en segundo plano las tareas fallidas o vencidas; no bloquea la respuesta
+    calentamiento.iniciar()
+    respuesta = {"calentamiento": calentamiento.resumen()}
+
+    try:
+        inicio = time.perf_counter()
+        connection = get_pool().acquire(timeout=float(current_app.config['SALUD_DB_TIMEOUT']))
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+        finally:
+            connection.close()
+        respuesta["db_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    except pymysql.Error as err:
+        current_app.logger.error("Health check sin acceso a MySQL: %s", err)
+        respuesta.update(estado="no_listo", error="Sin acceso a la base de datos")
+        return jsonify(respuesta), 503
+
+    if not calentamiento.listo:
+        respuesta["estado"] = "no_listo"
+        return jsonify(respuesta), 503
+    respuesta["estado"] = "listo"
+    return jsonify(respuesta)
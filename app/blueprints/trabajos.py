@@ -0,0 +1,143 @@
+"""
+Propósito: Contiene las rutas para enviar y consultar trabajos en segundo plano.
+Funcionalidad: Define un Blueprint (trabajos_bp) con rutas para enviar un trabajo (/trabajos),
+listar los recientes, consultar su estado y progreso (/trabajos/<id>), obtener su resultado
+(/trabajos/<id>/resultado) y cancelarlo (/trabajos/<id>/cancelar). El encabezado
+Idempotency-Key (propio de cada usuario) evita crear trabajos duplicados al reintentar un envío.
+"""
+
+import os
+
+from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import pymysql.cursors
+
+from ..db import get_db_connection
+from .. import trabajos
+
+# Crea un Blueprint llamado 'trabajos'
+trabajos_bp = Blueprint('trabajos', __name__)
+
+@trabajos_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_trabajo():
+    """Envía un trabajo en segundo plano"""
+    data = request.get_json()
+    tipo = data.get('tipo')
+    parametros = data.get('parametros', {})
+
+    tipo_registrado = trabajos.TIPOS.get(tipo)
+    if not tipo_registrado or not tipo_registrado.publico:
+        publicos = sorted(t.nombre for t in trabajos.TIPOS.values() if t.publico)
+        return jsonify({"error": f"Tipo de trabajo inválido; use uno de: {', '.join(publicos)}"}), 400
+    if not isinstance(parametros, dict):
+        return jsonify({"error": "parametros debe ser un objeto"}), 400
+
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            trabajo, creado = trabajos.enviar(
+                cursor, tipo, parametros,
+                clave=request.headers.get('Idempotency-Key'),
+                creado_por=get_jwt_identity()
+            )
+            connection.commit()
+            return jsonify({"trabajo": trabajo}), 202 if creado else 200
+    except trabajos.TipoTrabajoInvalido as e:
+        return jsonify({"error": str(e)}), 409
+    except pymysql.Error as err:
+        current_app.logger.error("Error al enviar trabajo %s: %s", tipo, err)
+        return jsonify({"error": "Error al enviar el trabajo"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+
+@trabajos_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_trabajos():
+    """Obtiene los trabajos más recientes (filtro opcional ?estado=)"""
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            return jsonify(trabajos.listar(cursor, request.args.get('estado')))
+    except pymysql.Error as err:
+        current_app.logger.error("Error al obtener trabajos: %s", err)
+        return jsonify({"error": "Error al obtener los trabajos"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+
+@trabajos_bp.route('/<int:id>', methods=['GET'])
+@jwt_required()
+def get_trabajo(id):
+    """Obtiene el estado y progreso de un trabajo"""
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            trabajo = trabajos.obtener(cursor, id)
+
+            if trabajo:
+                return jsonify(trabajo)
+            return jsonify({"error": "Trabajo no encontrado"}), 404
+    except pymysql.Error as err:
+        current_app.logger.error("Error al obtener trabajo %s: %s", id, err)
+        return jsonify({"error": "Error al obtener el trabajo"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+
+@trabajos_bp.route('/<int:id>/resultado', methods=['GET'])
+@jwt_required()
+def get_trabajo_resultado(id):
+    """Obtiene el resultado de un trabajo terminado (o el archivo que generó)"""
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            estado_resultado = trabajos.obtener_resultado(cursor, id)
+    except pymysql.Error as err:
+        current_app.logger.error("Error al obtener resultado del trabajo %s: %s", id, err)
+        return jsonify({"error": "Error al obtener el resultado"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
+
+    if estado_resultado is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    estado, resultado = estado_resultado
+    if estado != 'completado':
+        return jsonify({"error": f"El trabajo no está completado (estado: {estado})"}), 409
+
+    archivo = (resultado or {}).get('archivo')
+    if archivo and request.args.get('descargar', '').lower() in ('1', 'true'):
+        directorio = trabajos.directorio_archivos()
+        if not os.path.exists(os.path.join(directorio, archivo)):
+            return jsonify({"error": "El archivo del resultado ya no existe"}), 410
+        return send_from_directory(directorio, archivo, as_attachment=True)
+    return jsonify(resultado)
+
+@trabajos_bp.route('/<int:id>/cancelar', methods=['POST'])
+@jwt_required()
+def cancel_trabajo(id):
+    """Cancela un trabajo pendiente o solicita detener uno en ejecución"""
+    connection = None
+    try:
+        connection = get_db_connection()
+        with connection.cursor() as cursor:
+            trabajo = trabajos.cancelar(cursor, id)
+            connection.commit()
+
+            if not trabajo:
+                return jsonify({"error": "Trabajo no encontrado"}), 404
+            if trabajo['estado'] in ('completado', 'fallido'):
+                return jsonify({"error": "El trabajo ya terminó", "trabajo": trabajo}), 409
+            return jsonify({"trabajo": trabajo}), 202
+    except pymysql.Error as err:
+        current_app.logger.error("Error al cancelar trabajo %s: %s", id, err)
+        return jsonify({"error": "Error al cancelar el trabajo"}), 500
+    finally:
+        if connection is not None:
+            connection.close()
@@ -3,30 +3,22 @@ Propósito: Contiene las rutas y lógica para las operaciones CRUD de la tabla u
 Funcionalidad: Define un Blueprint (usuario_bp) que agrupa las rutas relacionadas con 
 usuarios (/usuarios, /usuarios/<id>). Incluye funciones para obtener todos los usuarios, 
 obtener un usuario específico, crear, actualizar y eliminar usuarios, con validaciones 
-y manejo de errores. Todas las rutas excepto GET están protegidas por JWT.
+y manejo de errores. Todas las rutas excepto GET están protegidas por JWT. Las rutas GET
+aceptan ?fields= para leer sólo las columnas pedidas.
 """
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 import pymysql.cursors
-import bcrypt
 import re
 
+from ..db import get_db_connection
+from ..hashing import hash_password
+from ..campos import CAMPOS_USUARIO, CamposInvalidos, campos_solicitados, lista_select
+
 # Crea un Blueprint llamado 'usuario'
 usuario_bp = Blueprint('usuario', __name__)
 
-def get_db_connection():
-    """Establece una conexión a la base de datos MySQL usando PyMySQL"""
-    return pymysql.connect(
-        host=current_app.config['MYSQL_HOST'],
-        user=current_app.config['MYSQL_USER'],
-        password=current_app.config['MYSQL_PASSWORD'],
-        database=current_app.config['MYSQL_DATABASE'],
-        port=int(current_app.config['MYSQL_PORT']),
-        cursorclass=pymysql.cursors.DictCursor,
-        connect_timeout=5
-    )
-
 def validate_password(password):
     """Valida que la contraseña cumpla con los requisitos mínimos"""
     if len(password) < 6:
@@ -42,27 +34,40 @@ def validate_numero(numero):
 @jwt_required()
 def get_usuarios():
     """Obtiene todos los usuarios (sin información sensible)"""
+    try:
+        campos = campos_solicitados(CAMPOS_USUARIO)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
-            cursor.execute("SELECT id, numero, nombre, apellido FROM usuarios")
+            cursor.execute(f"SELECT {lista_select(campos)} FROM usuarios")
             usuarios = cursor.fetchall()
             return jsonify(usuarios)
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al obtener usuarios: {str(err)}")
+        current_app.logger.error("Error al obtener usuarios: %s", err)
         return jsonify({"error": "Error al obtener los usuarios"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @usuario_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_usuario(id):
     """Obtiene un usuario específico por ID (sin información sensible)"""
+    try:
+        campos = campos_solicitados(CAMPOS_USUARIO)
+    except CamposInvalidos as e:
+        return jsonify({"error": str(e)}), 400
+
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
             cursor.execute(
-                "SELECT id, numero, nombre, apellido FROM usuarios WHERE id = %s", 
+                f"SELECT {lista_select(campos)} FROM usuarios WHERE id = %s", 
                 (id,)
             )
             usuario = cursor.fetchone()
@@ -71,10 +76,11 @@ def get_usuario(id):
                 return jsonify(usuario)
             return jsonify({"error": "Usuario no encontrado"}), 404
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al obtener usuario {id}: {str(err)}")
+        current_app.logger.error("Error al obtener usuario %s: %s", id, err)
         return jsonify({"error": "Error al obtener el usuario"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @usuario_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -96,6 +102,7 @@ def create_usuario():
     if not validate_password(contrasena):
         return jsonify({"error": "La contraseña debe tener al menos 6 caracteres"}), 400
 
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -105,7 +112,7 @@ def create_usuario():
                 return jsonify({"error": "El número ya está registrado"}), 409
 
             # Hashea la contraseña
-            hashed_password = bcrypt.hashpw(contrasena.encode('utf-8'), bcrypt.gensalt())
+            hashed_password = hash_password(contrasena)
 
             # Inserta el nuevo usuario
             cursor.execute(
@@ -127,10 +134,11 @@ def create_usuario():
                 }
             }), 201
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al crear usuario: {str(err)}")
+        current_app.logger.error("Error al crear usuario: %s", err)
         return jsonify({"error": "Error al crear el usuario"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @usuario_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
@@ -149,6 +157,7 @@ def update_usuario(id):
     if not validate_numero(numero):
         return jsonify({"error": "Número de usuario inválido"}), 400
 
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -182,7 +191,7 @@ def update_usuario(id):
             if contrasena:
                 if not validate_password(contrasena):
                     return jsonify({"error": "La contraseña debe tener al menos 6 caracteres"}), 400
-                hashed_password = bcrypt.hashpw(contrasena.encode('utf-8'), bcrypt.gensalt())
+                hashed_password = hash_password(contrasena)
                 update_fields.append("contrasena = %s")
                 update_values.append(hashed_password)
             
@@ -206,15 +215,17 @@ def update_usuario(id):
                 }
             })
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al actualizar usuario {id}: {str(err)}")
+        current_app.logger.error("Error al actualizar usuario %s: %s", id, err)
         return jsonify({"error": "Error al actualizar el usuario"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 @usuario_bp.route('/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_usuario(id):
     """Elimina un usuario"""
+    connection = None
     try:
         connection = get_db_connection()
         with connection.cursor() as cursor:
@@ -232,7 +243,8 @@ def delete_usuario(id):
                 
             return jsonify({"message": "Usuario eliminado exitosamente"})
     except pymysql.Error as err:
-        current_app.logger.error(f"Error al eliminar usuario {id}: {str(err)}")
+        current_app.logger.error("Error al eliminar usuario %s: %s", id, err)
         return jsonify({"error": "Error al eliminar el usuario"}), 500
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
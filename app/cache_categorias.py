@@ -0,0 +1,79 @@
+"""
+Propósito: Caché en memoria (por worker) de los nombres de categoría.
+Funcionalidad: La tabla categoria es pequeña, así que se carga completa con una sola consulta
+y se reutiliza durante CATEGORIA_CACHE_TTL segundos. Las rutas de categorías la invalidan al
+escribir; los demás workers la refrescan al vencer el TTL. Se usa para resolver
+productos.nombre_categoria en lectura cuando NOMBRE_CATEGORIA_MODO = 'lectura'.
+"""
+
+import threading
+import time
+
+from flask import current_app
+
+from .db import get_db_connection
+
+
+class CategoriaCache:
+    """Mapa id -> nombre de todas las categorías con expiración por TTL"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._nombres = None
+        self._cargado = 0.0
+        self._lock = threading.Lock()
+
+    def _vigentes(self):
+        """Devuelve el mapa actual si no venció, o None"""
+        nombres, cargado = self._nombres, self._cargado
+        if nombres is not None and time.monotonic() - cargado < self.ttl:
+            return nombres
+        return None
+
+    def cargar(self, cursor=None):
+        """Relee todas las categorías desde MySQL (con el cursor dado o una conexión del pool)"""
+        if cursor is None:
+            connection = get_db_connection()
+            try:
+                with connection.cursor() as cursor:
+                    return self.cargar(cursor)
+            finally:
+                connection.close()
+        cursor.execute("SELECT id, nombre FROM categoria")
+        nombres = {fila['id']: fila['nombre'] for fila in cursor.fetchall()}
+        self._nombres, self._cargado = nombres, time.monotonic()
+        return nombres
+
+    def nombres(self, cursor=None):
+        """Devuelve el mapa id -> nombre, recargándolo si venció"""
+        # Se lee el mapa una sola vez: invalidar() puede ponerlo en None entre la comprobación
+        # y el return
+        nombres = self._vigentes()
+        if nombres is not None:
+            return nombres
+        with self._lock:
+            # Otro hilo pudo recargarla mientras se esperaba el lock
+            nombres = self._vigentes()
+            if nombres is not None:
+                return nombres
+            return self.cargar(cursor)
+
+    def invalidar(self):
+        self._nombres = None
+
+
+def init_app(app):
+    app.extensions['categoria_cache'] = CategoriaCache(float(app.config['CATEGORIA_CACHE_TTL']))
+
+
+def get_cache():
+    """Devuelve la caché de categorías de la app actual"""
+    return current_app.extensions['categoria_cache']
+
+
+def resolver_nombres(productos, cursor=None):
+    """Completa nombre_categoria de cada producto a partir de la caché"""
+    nombres = get_cache().nombres(cursor)
+    for producto in productos:
+        producto['nombre_categoria'] = nombres.get(producto.get('categoria_id'), '')
+    return productos
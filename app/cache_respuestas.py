@@ -0,0 +1,310 @@
+"""
+Propósito: Caché (por worker) de respuestas ya serializadas de las rutas GET más consultadas.
+Funcionalidad: El decorador @cachear guarda los bytes finales de una respuesta 200 (y su
+variante gzip) con clave ruta + parámetros + query string + alcance de autorización, en un LRU
+acotado por bytes y con TTL. Cada entrada lleva etiquetas de entidad ('productos',
+'producto:5', ...) y las rutas de escritura llaman a publicar() con las etiquetas que
+modifican para invalidarlas. La invalidación llega a todos los workers de la máquina: cada
+etiqueta tiene un contador de generación en un archivo mapeado en memoria compartido
+(CACHE_RESPUESTAS_ARCHIVO), publicar() lo incrementa y una entrada sólo se sirve si las
+generaciones de sus etiquetas no cambiaron desde que se calculó. Con varias máquinas detrás de
+un balanceador las demás siguen sirviendo su copia como mucho CACHE_RESPUESTAS_TTL segundos.
+Periódicamente se registra en el logger 'app.cache' la tasa de aciertos y la memoria usada.
+"""
+
+import functools
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from .db import registrar_escritura
+
+cache_logger = logging.getLogger('app.cache')
+
+# Bytes estimados por entrada además del cuerpo (clave, etiquetas, objeto de la entrada)
+SOBRECARGA_ENTRADA = 512
+
+# Contadores del archivo de generaciones; las etiquetas se reparten por hash entre ellos (una
+# colisión sólo provoca invalidaciones de más, nunca una respuesta obsoleta)
+RANURAS = 4096
+_CONTADOR = struct.Struct('=Q')
+
+
+class Generaciones:
+    """
+    Contadores de invalidación por etiqueta compartidos por los procesos de la máquina mediante
+    un archivo mapeado en memoria. Leerlos no toma ningún lock ni hace E/S.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._mapa = None
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _abrir(self):
+        # Se abre en cada proceso (tras el fork de gunicorn) en su primer uso
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    import mmap
+                    fd = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o600)
+                    if os.fstat(fd).st_size < RANURAS * _CONTADOR.size:
+                        os.ftruncate(fd, RANURAS * _CONTADOR.size)
+                    self._mapa = mmap.mmap(fd, RANURAS * _CONTADOR.size)
+                    self._fd = fd
+                    self._pid = os.getpid()
+        return self._mapa
+
+    def _posicion(self, etiqueta):
+        return zlib.crc32(etiqueta.encode('utf-8')) % RANURAS * _CONTADOR.size
+
+    def leer(self, etiquetas):
+        mapa = self._abrir()
+        return tuple(_CONTADOR.unpack_from(mapa, self._posicion(e))[0] for e in etiquetas)
+
+    def incrementar(self, etiquetas):
+        import fcntl
+        mapa = self._abrir()
+        posiciones = {self._posicion(e) for e in etiquetas}
+        # El lock del hilo excluye al resto del proceso; lockf, a los demás procesos
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for posicion in posiciones:
+                    valor = _CONTADOR.unpack_from(mapa, posicion)[0]
+                    _CONTADOR.pack_into(mapa, posicion, valor + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class _Entrada:
+    __slots__ = ('cuerpo', 'gzip', 'mimetype', 'etiquetas', 'generaciones', 'expira', 'tamano')
+
+    def __init__(self, cuerpo, comprimido, mimetype, etiquetas, generaciones, expira):
+        self.cuerpo = cuerpo
+        self.gzip = comprimido
+        self.mimetype = mimetype
+        self.etiquetas = etiquetas
+        self.generaciones = generaciones
+        self.expira = expira
+        self.tamano = len(cuerpo) + len(comprimido or b'') + SOBRECARGA_ENTRADA
+
+
+class CacheRespuestas:
+    """LRU de respuestas serializadas acotado por bytes, con TTL e invalidación por etiquetas"""
+
+    def __init__(self, max_bytes, ttl, gzip_min=1024, generaciones=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.gzip_min = gzip_min
+        self.generaciones = generaciones or Generaciones(
+            os.path.join(tempfile.gettempdir(), 'cache_respuestas.gen')
+        )
+        self._entradas = OrderedDict()
+        self._por_etiqueta = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def obtener(self, clave):
+        """Devuelve la entrada vigente de la clave (marcándola como reciente) o None"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and (
+                entrada.expira <= time.monotonic()
+                # Otro worker publicó una escritura sobre alguna de sus etiquetas
+                or self.generaciones.leer(entrada.etiquetas) != entrada.generaciones
+            ):
+                self._quitar(clave)
+                entrada = None
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def marca(self, etiquetas):
+        """Generaciones actuales de las etiquetas; se toman antes de calcular una respuesta"""
+        return self.generaciones.leer(etiquetas)
+
+    def guardar(self, clave, cuerpo, mimetype, etiquetas, marca):
+        """Guarda una respuesta si ninguna de sus etiquetas se invalidó mientras se calculaba"""
+        expira = time.monotonic() + self.ttl
+        if len(cuerpo) + SOBRECARGA_ENTRADA > self.max_bytes:
+            # No cabría en la caché: no vale la pena comprimirla en el hilo de la petición
+            return _Entrada(cuerpo, None, mimetype, etiquetas, marca, expira)
+        import gzip  # Sólo hace falta al guardar la primera respuesta
+        comprimido = gzip.compress(cuerpo, 6) if len(cuerpo) >= self.gzip_min else None
+        entrada = _Entrada(cuerpo, comprimido, mimetype, etiquetas, marca, expira)
+        if entrada.tamano > self.max_bytes:
+            return entrada
+        with self._lock:
+            if self.generaciones.leer(etiquetas) != marca:
+                return entrada
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = entrada
+            self.bytes += entrada.tamano
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            while self.bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+                self.expulsiones += 1
+        return entrada
+
+    def invalidar(self, *etiquetas):
+        """
+        Invalida las etiquetas en todos los workers de la máquina y libera ya las entradas de
+        este; los demás descartan las suyas al consultarlas
+        """
+        self.generaciones.incrementar(etiquetas)
+        with self._lock:
+            for etiqueta in etiquetas:
+                for clave in self._por_etiqueta.pop(etiqueta, ()):
+                    if clave in self._entradas:
+                        self._quitar(clave)
+
+    def limpiar(self):
+        with self._lock:
+            for clave in list(self._entradas):
+                self._quitar(clave)
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave)
+        self.bytes -= entrada.tamano
+        for etiqueta in entrada.etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def estadisticas(self):
+        """Tasa de aciertos, entradas y memoria usada desde el arranque del worker"""
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+        }
+
+
+class _Reporte:
+    """Emite las estadísticas de la caché en el log cada `intervalo` segundos"""
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._siguiente = time.monotonic() + intervalo
+
+    def quizas_emitir(self, cache):
+        if self.intervalo <= 0 or time.monotonic() < self._siguiente:
+            return
+        self._siguiente = time.monotonic() + self.intervalo
+        cache_logger.info("Estadísticas de la caché de respuestas", extra=cache.estadisticas())
+
+
+def init_app(app):
+    """Crea la caché de respuestas si CACHE_RESPUESTAS_HABILITADO está activo"""
+    if not app.config['CACHE_RESPUESTAS_HABILITADO']:
+        app.extensions['cache_respuestas'] = None
+        return
+    app.extensions['cache_respuestas'] = CacheRespuestas(
+        max_bytes=int(float(app.config['CACHE_RESPUESTAS_MAX_MB']) * 1024 * 1024),
+        ttl=float(app.config['CACHE_RESPUESTAS_TTL']),
+        gzip_min=int(app.config['CACHE_RESPUESTAS_GZIP_MIN']),
+        generaciones=Generaciones(app.config['CACHE_RESPUESTAS_ARCHIVO'] or os.path.join(
+            tempfile.gettempdir(), 'cache_respuestas.gen'
+        )),
+    )
+    app.extensions['cache_respuestas_reporte'] = _Reporte(float(app.config['CACHE_RESPUESTAS_REPORTE']))
+
+
+def get_cache():
+    """Devuelve la caché de respuestas de la app actual (None si está deshabilitada)"""
+    return current_app.extensions.get('cache_respuestas')
+
+
+def publicar(*etiquetas):
+    """Invalida las respuestas cacheadas de las entidades modificadas por una escritura"""
+    # Primero la época: quien consulte la caché después tampoco se suma a una lectura previa
+    registrar_escritura()
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidar(*etiquetas)
+
+
+def _clave(por_usuario):
+    """Ruta + parámetros de la URL + query string ordenada + alcance de autorización"""
+    alcance = f"usuario:{get_jwt_identity()}" if por_usuario else "jwt"
+    return (
+        request.endpoint,
+        tuple(sorted((request.view_args or {}).items())),
+        tuple(sorted(request.args.items(multi=True))),
+        alcance,
+    )
+
+
+def _responder(entrada, status=200):
+    """Construye la respuesta desde la entrada eligiendo la variante según Accept-Encoding"""
+    # accept_encodings respeta los pesos: "gzip;q=0" rechaza gzip
+    usar_gzip = entrada.gzip is not None and request.accept_encodings['gzip'] > 0
+    response = current_app.response_class(
+        entrada.gzip if usar_gzip else entrada.cuerpo, status=status, mimetype=entrada.mimetype
+    )
+    if usar_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    if entrada.gzip is not None:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def cachear(*etiquetas, por_usuario=False):
+    """
+    Cachea la respuesta 200 de una ruta GET. Las etiquetas pueden usar los parámetros de la
+    ruta, p. ej. @cachear('producto', 'producto:{id}'). Debe ir debajo de @jwt_required() para
+    que la autenticación se verifique antes de servir desde la caché; con por_usuario=True la
+    clave incluye la identidad del JWT.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return vista(*args, **kwargs)
+            current_app.extensions['cache_respuestas_reporte'].quizas_emitir(cache)
+
+            clave = _clave(por_usuario)
+            entrada = cache.obtener(clave)
+            if entrada is not None:
+                response = _responder(entrada)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            resueltas = tuple(etiqueta.format(**kwargs) for etiqueta in etiquetas)
+            marca = cache.marca(resueltas)
+            response = make_response(vista(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            entrada = cache.guardar(clave, response.get_data(), response.mimetype, resueltas, marca)
+            response = _responder(entrada)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return envoltura
+    return decorador
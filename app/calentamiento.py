@@ -0,0 +1,163 @@
+"""
+Propósito: Calentamiento del worker antes de declararlo listo para recibir tráfico.
+Funcionalidad: Ejecuta en paralelo, cada una en su hilo, las tareas que de otro modo pagarían
+las primeras peticiones: crear las tablas auxiliares que falten (categoria_stats y trabajos),
+abrir las DB_POOL_MIN conexiones del pool, cargar la caché de nombres de categoría y leer
+swagger.json en memoria. Todo el calentamiento está acotado por CALENTAMIENTO_PLAZO segundos;
+las tareas que fallan o vencen se reintentan cuando /health/ready vuelve a consultar, así que
+el worker pasa a listo en cuanto MySQL responde (las demás peticiones no lo relanzan). Arranca
+desde el hook post_worker_init de gunicorn (ver gunicorn.conf.py) o, si no, con la primera
+petición.
+"""
+
+import logging
+import threading
+import time
+
+from flask import current_app
+
+from . import cache_categorias, estadisticas, trabajos
+from .db import get_db_connection, get_pool
+
+logger = logging.getLogger('app.calentamiento')
+
+# Lock de MySQL con el que los workers se turnan para crear las tablas auxiliares
+LOCK_ESQUEMA = 'app_esquema'
+
+
+def _preparar_esquema():
+    """Crea (una sola vez entre todos los workers) las tablas que las rutas necesitan"""
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS ok",
+                           (LOCK_ESQUEMA, float(current_app.config['CALENTAMIENTO_PLAZO'])))
+            if not cursor.fetchone()['ok']:
+                raise RuntimeError("Otro worker está preparando el esquema")
+        try:
+            trabajos.asegurar_tabla(connection)
+            if estadisticas.asegurar_tabla(connection):
+                logger.info("Tabla categoria_stats creada y reconstruida desde productos")
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_ESQUEMA,))
+    finally:
+        connection.close()
+
+
+def _abrir_pool():
+    get_pool().fill()
+
+
+def _cargar_categorias():
+    cache_categorias.get_cache().cargar()
+
+
+def _cargar_swagger():
+    from .blueprints.documentacion import cargar_spec
+    cargar_spec()
+
+
+TAREAS = {
+    'esquema': _preparar_esquema,
+    'pool': _abrir_pool,
+    'categorias': _cargar_categorias,
+    'swagger': _cargar_swagger,
+}
+
+
+class Calentamiento:
+    """Estado de las tareas de calentamiento de un worker"""
+
+    def __init__(self, app, plazo):
+        self.app = app
+        self.plazo = plazo
+        self.estado = {nombre: {"estado": "pendiente"} for nombre in TAREAS}
+        self._hilos = {}
+        self._lock = threading.Lock()
+        self._en_curso = False
+        self._arrancado = False
+
+    @property
+    def listo(self):
+        return all(tarea['estado'] == 'ok' for tarea in self.estado.values())
+
+    def resumen(self):
+        return {nombre: dict(tarea) for nombre, tarea in self.estado.items()}
+
+    def arrancar(self):
+        """Primer calentamiento del worker; una sola vez, los reintentos los pide /health/ready"""
+        if self._arrancado:
+            return
+        with self._lock:
+            if self._arrancado:
+                return
+            self._arrancado = True
+        self.iniciar()
+
+    def iniciar(self):
+        """Lanza (en segundo plano) las tareas pendientes o fallidas; no hace nada si ya está listo"""
+        if self.listo or self._en_curso:
+            return
+        with self._lock:
+            if self.listo or self._en_curso:
+                return
+            self._en_curso = True
+        threading.Thread(target=self._ejecutar, name='calentamiento', daemon=True).start()
+
+    def _ejecutar(self):
+        try:
+            limite = time.monotonic() + self.plazo
+            lanzadas = []
+            for nombre, funcion in TAREAS.items():
+                hilo = self._hilos.get(nombre)
+                # Una tarea vencida que sigue en curso no se duplica; terminará por su cuenta
+                if self.estado[nombre]['estado'] == 'ok' or (hilo is not None and hilo.is_alive()):
+                    continue
+                self.estado[nombre] = {"estado": "en_curso"}
+                hilo = threading.Thread(target=self._tarea, args=(nombre, funcion),
+                                        name=f'calentamiento-{nombre}', daemon=True)
+                self._hilos[nombre] = hilo
+                hilo.start()
+                lanzadas.append(nombre)
+
+            for nombre in lanzadas:
+                self._hilos[nombre].join(max(0.0, limite - time.monotonic()))
+                if self._hilos[nombre].is_alive():
+                    self.estado[nombre] = {"estado": "vencida", "plazo_s": self.plazo}
+
+            nivel = logging.INFO if self.listo else logging.WARNING
+            logger.log(nivel, "Calentamiento %s", "completado" if self.listo else "incompleto",
+                       extra={"tareas": self.resumen()})
+        finally:
+            self._en_curso = False
+
+    def _tarea(self, nombre, funcion):
+        inicio = time.perf_counter()
+        try:
+            with self.app.app_context():
+                funcion()
+        except Exception as e:
+            self.estado[nombre] = {"estado": "error", "error": str(e),
+                                   "ms": round((time.perf_counter() - inicio) * 1000, 2)}
+            return
+        self.estado[nombre] = {"estado": "ok", "ms": round((time.perf_counter() - inicio) * 1000, 2)}
+
+
+def init_app(app):
+    app.extensions['calentamiento'] = Calentamiento(app, float(app.config['CALENTAMIENTO_PLAZO']))
+    # Respaldo cuando no se usa gunicorn (flask run, run_gevent.py): arranca con la primera petición
+    app.before_request(_iniciar)
+
+
+def iniciar(app):
+    """Arranca el calentamiento de la app (llamado desde el hook post_worker_init de gunicorn)"""
+    app.extensions['calentamiento'].arrancar()
+
+
+def get_calentamiento():
+    return current_app.extensions['calentamiento']
+
+
+def _iniciar():
+    get_calentamiento().arrancar()
@@ -0,0 +1,44 @@
+"""
+Propósito: Soporte del parámetro ?fields= (sparse fieldsets) en las rutas GET.
+Funcionalidad: Valida los campos pedidos contra la lista blanca de columnas de cada recurso y
+los traduce en una lista explícita de columnas para el SELECT, de modo que MySQL no envía (ni
+Python convierte a dict ni serializa) columnas que el cliente no usa, como descripcion.
+Sin ?fields= se devuelven todas las columnas de la lista blanca.
+"""
+
+from flask import request
+
+# Columnas que cada recurso puede exponer, en el orden en que se devuelven
+CAMPOS_PRODUCTO = ('id', 'nombre', 'precio', 'descripcion', 'categoria_id', 'nombre_categoria')
+CAMPOS_CATEGORIA = ('id', 'nombre')
+CAMPOS_USUARIO = ('id', 'numero', 'nombre', 'apellido')
+CAMPOS_CATEGORIA_STATS = ('categoria_id', 'nombre', 'total_productos', 'precio_min',
+                          'precio_promedio', 'precio_max', 'ultimos_productos')
+
+
+class CamposInvalidos(ValueError):
+    """Se pidieron campos que no están en la lista blanca del recurso"""
+
+
+def campos_solicitados(permitidos):
+    """
+    Devuelve la lista de campos pedidos con ?fields=a,b (sin duplicados, en el orden de la
+    lista blanca) o todos los permitidos si no se indicó el parámetro.
+    """
+    valor = request.args.get('fields')
+    if valor is None:
+        return list(permitidos)
+    pedidos = {campo.strip() for campo in valor.split(',') if campo.strip()}
+    if not pedidos:
+        raise CamposInvalidos("fields no puede estar vacío")
+    invalidos = pedidos - set(permitidos)
+    if invalidos:
+        raise CamposInvalidos(
+            f"Campos inválidos: {', '.join(sorted(invalidos))}. Permitidos: {', '.join(permitidos)}"
+        )
+    return [campo for campo in permitidos if campo in pedidos]
+
+
+def lista_select(campos):
+    """Convierte campos validados en la lista de columnas de un SELECT"""
+    return ', '.join(f"`{campo}`" for campo in campos)
@@ -3,9 +3,19 @@ Propósito: Gestiona la configuración de la aplicación Flask.
 Funcionalidad: Define clases de configuración para diferentes entornos (desarrollo, 
 producción) que extraen variables de entorno desde .env. Proporciona una estructura 
 centralizada para acceder a configuraciones como credenciales de MySQL y la clave secreta.
+El archivo .env se lee una sola vez, al importar este módulo y antes de evaluar Config, de modo
+que sus valores llegan a todas las opciones; python-dotenv sólo se importa si el archivo existe
+(en producción las variables vienen del entorno de la plataforma).
 """
 
 import os
+from pathlib import Path
+
+ENV_PATH = Path('.') / '.env'
+
+if ENV_PATH.is_file():
+    from dotenv import load_dotenv
+    load_dotenv(ENV_PATH)
 
 class Config:
     # Configuración de MySQL
@@ -14,7 +24,69 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'YGdRCcTLeuiGqiMEBMVDlZondeuiGAAP')
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'railway')
     MYSQL_PORT = os.getenv('MYSQL_PORT', '26298')  # Como string
+
+    # JWT y clave secreta de la aplicación
+    JWT_SECRET_KEY = os.getenv('SECRET_KEY', 'Yeicy')
+    SECRET_KEY = JWT_SECRET_KEY
+    JWT_TOKEN_LOCATION = ['headers']
+    JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hora
+
+    # Pool de conexiones (por worker)
+    DB_POOL_MIN = os.getenv('DB_POOL_MIN', '1')
+    DB_POOL_MAX = os.getenv('DB_POOL_MAX', '10')
+    DB_POOL_TIMEOUT = os.getenv('DB_POOL_TIMEOUT', '10')  # Segundos de espera por una conexión libre
+    DB_POOL_RECYCLE = os.getenv('DB_POOL_RECYCLE', '300')  # Segundos inactiva antes de verificarla con ping
+    # Lecturas idénticas concurrentes comparten una sola consulta (ver db.leer_compartido)
+    DB_COALESCER = os.getenv('DB_COALESCER', 'true').lower() in ('1', 'true', 'yes')
+    DB_COALESCER_PLAZO = os.getenv('DB_COALESCER_PLAZO', '5')  # Segundos que se espera a la consulta en curso
     
+    # Nombre de categoría en productos: 'copia' guarda y propaga productos.nombre_categoria;
+    # 'lectura' deja de guardarlo y lo resuelve al leer desde la caché de categorías
+    NOMBRE_CATEGORIA_MODO = os.getenv('NOMBRE_CATEGORIA_MODO', 'copia')
+    PROPAGACION_LOTE = os.getenv('PROPAGACION_LOTE', '1000')  # Filas por UPDATE al propagar
+    CATEGORIA_CACHE_TTL = os.getenv('CATEGORIA_CACHE_TTL', '30')  # Segundos
+
+    # Importación masiva de productos
+    IMPORT_LOTE = os.getenv('IMPORT_LOTE', '500')  # Filas por transacción
+    IMPORT_MAX_ERRORES = os.getenv('IMPORT_MAX_ERRORES', '1000')  # Errores por fila reportados
+
+    # Trabajos en segundo plano (ver trabajos.py)
+    JOBS_HABILITADOS = os.getenv('JOBS_HABILITADOS', 'true').lower() in ('1', 'true', 'yes')
+    JOBS_MAX_HILOS = os.getenv('JOBS_MAX_HILOS', '2')  # Trabajos simultáneos por worker
+    JOBS_INTERVALO = os.getenv('JOBS_INTERVALO', '2')  # Segundos entre sondeos
+    JOBS_LATIDO_EXPIRA = os.getenv('JOBS_LATIDO_EXPIRA', '60')  # Segundos sin latido para reintentar
+    JOBS_MAX_INTENTOS = os.getenv('JOBS_MAX_INTENTOS', '3')
+    JOBS_DIR = os.getenv('JOBS_DIR', '')  # Vacío: directorio temporal del sistema
+    JOBS_RETENCION = os.getenv('JOBS_RETENCION', '86400')  # Segundos que se conservan los archivos
+
+    # Límite de intentos en /auth/login (token bucket compartido por los workers vía SQLite)
+    LOGIN_LIMITE_HABILITADO = os.getenv('LOGIN_LIMITE_HABILITADO', 'true').lower() in ('1', 'true', 'yes')
+    LOGIN_LIMITE_NUMERO = os.getenv('LOGIN_LIMITE_NUMERO', '5')  # Intentos por número de usuario
+    LOGIN_LIMITE_IP = os.getenv('LOGIN_LIMITE_IP', '20')  # Intentos por IP
+    LOGIN_LIMITE_VENTANA = os.getenv('LOGIN_LIMITE_VENTANA', '300')  # Segundos para recuperar todos
+    LOGIN_LIMITE_DB = os.getenv('LOGIN_LIMITE_DB', '')  # Vacío: archivo en el directorio temporal
+    # Proxies de confianza delante de la app que agregan X-Forwarded-For. Dejar en 0 si los
+    # clientes llegan directo (si no, pueden elegir su IP); usar 1 detrás de un balanceador o
+    # router como el de Heroku/Railway, y N si hay N proxies encadenados.
+    LOGIN_PROXIES = os.getenv('LOGIN_PROXIES', '0')
+
+    # Caché de respuestas GET serializadas (por worker, ver cache_respuestas.py)
+    CACHE_RESPUESTAS_HABILITADO = os.getenv('CACHE_RESPUESTAS_HABILITADO', 'true').lower() in ('1', 'true', 'yes')
+    CACHE_RESPUESTAS_MAX_MB = os.getenv('CACHE_RESPUESTAS_MAX_MB', '32')  # Cuerpos + variantes gzip
+    CACHE_RESPUESTAS_TTL = os.getenv('CACHE_RESPUESTAS_TTL', '10')  # Segundos; acota lo obsoleto en otras máquinas
+    CACHE_RESPUESTAS_GZIP_MIN = os.getenv('CACHE_RESPUESTAS_GZIP_MIN', '1024')  # Bytes mínimos para comprimir
+    # Archivo compartido por los workers de la máquina con las generaciones de invalidación
+    CACHE_RESPUESTAS_ARCHIVO = os.getenv('CACHE_RESPUESTAS_ARCHIVO', '')  # Vacío: directorio temporal
+    CACHE_RESPUESTAS_REPORTE = os.getenv('CACHE_RESPUESTAS_REPORTE', '60')  # Segundos entre logs de estadísticas; 0 los desactiva
+
+    # Calentamiento del worker y /health/ready
+    CALENTAMIENTO_PLAZO = os.getenv('CALENTAMIENTO_PLAZO', '15')  # Segundos máximos para el calentamiento
+    SALUD_DB_TIMEOUT = os.getenv('SALUD_DB_TIMEOUT', '2')  # Espera máxima por una conexión en /health/ready
+
+    # Registro (logging)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    ACCESS_LOG = os.getenv('ACCESS_LOG', 'true').lower() in ('1', 'true', 'yes')
+
     def __repr__(self):
         return f"<Config: {self.MYSQL_HOST}:{self.MYSQL_PORT} DB:{self.MYSQL_DATABASE} USER:{self.MYSQL_USER}>"
 
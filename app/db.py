@@ -0,0 +1,281 @@
+"""
+Propósito: Centraliza el acceso a la base de datos MySQL de la aplicación.
+Funcionalidad: Define un pool de conexiones PyMySQL compartido por todos los Blueprints.
+El pool usa primitivas de queue/threading, por lo que es seguro tanto con hilos (workers
+sync/gthread de gunicorn) como con greenlets cuando gevent ha parcheado la librería estándar
+(ver run_gevent.py). get_db_connection() devuelve una conexión cuyo close() la regresa al pool
+en lugar de cerrar el socket, así que las rutas existentes no necesitan cambios.
+leer_compartido() agrupa las lecturas idénticas concurrentes (single-flight): tras un deploy o
+al vencer la caché, N peticiones a GET /productos/ ejecutan una sola consulta en el worker.
+"""
+
+import queue
+import threading
+import time
+
+from flask import current_app
+import pymysql.cursors
+from pymysql.constants import SERVER_STATUS
+
+from .logs import add_db_time
+
+
+class PoolAgotadoError(pymysql.OperationalError):
+    """No se obtuvo una conexión libre dentro del tiempo de espera del pool"""
+
+
+class TimedDictCursor(pymysql.cursors.DictCursor):
+    """DictCursor que acumula el tiempo de cada consulta para el log de acceso"""
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            add_db_time(time.perf_counter() - start)
+
+
+class PooledConnection:
+    """Envoltorio de una conexión PyMySQL que vuelve al pool al llamar close()"""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def close(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise pymysql.err.InterfaceError("La conexión ya fue devuelta al pool")
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones PyMySQL.
+
+    La cola se rellena con max_size marcadores; cada marcador es una conexión abierta o
+    None (hueco aún sin conectar). Así el número de conexiones nunca supera max_size y
+    los solicitantes esperan (cediendo el control bajo gevent) cuando no hay huecos.
+    """
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10, timeout=10, recycle=300):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._queue = queue.LifoQueue(maxsize=max_size)
+        for _ in range(max_size):
+            self._queue.put(None)
+
+    def _connect(self):
+        return pymysql.connect(**self.connect_kwargs)
+
+    def fill(self, count=None):
+        """Abre conexiones hasta tener al menos count (por defecto min_size) listas en el pool"""
+        count = self.min_size if count is None else count
+        taken = []
+        try:
+            for _ in range(count):
+                taken.append(self._queue.get(timeout=self.timeout))
+            for i, conn in enumerate(taken):
+                if conn is None:
+                    taken[i] = self._connect()
+        finally:
+            for conn in taken:
+                if conn is None:
+                    self._queue.put(None)
+                else:
+                    self.release(conn)
+
+    def acquire(self, timeout=None):
+        """Obtiene una conexión del pool, abriéndola o verificándola si hace falta"""
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            connection = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolAgotadoError(
+                f"No hay conexiones libres tras {timeout}s (máximo {self.max_size})"
+            )
+
+        try:
+            if connection is None:
+                connection = self._connect()
+            elif time.monotonic() - connection.pool_last_used > self.recycle:
+                connection.ping(reconnect=True)
+        except Exception:
+            # Libera el hueco para que otro solicitante pueda reintentar
+            self._queue.put(None)
+            raise
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        """Devuelve una conexión al pool descartando transacciones sin confirmar"""
+        try:
+            if connection.open and connection.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                connection.rollback()
+        except pymysql.Error:
+            try:
+                connection.close()
+            except pymysql.Error:
+                pass
+
+        connection.pool_last_used = time.monotonic()
+        self._queue.put(connection if connection.open else None)
+
+    def close_all(self):
+        """Cierra todas las conexiones actualmente libres en el pool"""
+        drained = []
+        while True:
+            try:
+                drained.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for connection in drained:
+            if connection is not None:
+                connection.close()
+            self._queue.put_nowait(None)
+
+
+class _Vuelo:
+    """Consulta en curso a la que se suman las peticiones idénticas"""
+    __slots__ = ('listo', 'resultado', 'error')
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Ejecuta una sola vez las funciones con la misma clave que coinciden en el tiempo.
+
+    El primer solicitante (líder) ejecuta la función; los demás esperan su resultado o su
+    excepción. Si el líder tarda más que `plazo` segundos, cada seguidor deja de esperarlo y
+    ejecuta la función por su cuenta, de modo que una consulta atascada no arrastra a todos.
+
+    `epoca` cuenta las escrituras publicadas en el proceso; forma parte de la clave de las
+    lecturas compartidas para que nadie se sume a una consulta iniciada antes de una escritura.
+    """
+
+    def __init__(self, plazo):
+        self.plazo = plazo
+        self._vuelos = {}
+        self._lock = threading.Lock()
+        self.epoca = 0
+        self.ejecutadas = 0
+        self.compartidas = 0
+        self.vencidas = 0
+
+    def nueva_epoca(self):
+        with self._lock:
+            self.epoca += 1
+
+    def hacer(self, clave, funcion):
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+                self.ejecutadas += 1
+            else:
+                self.compartidas += 1
+
+        if lider:
+            try:
+                vuelo.resultado = funcion()
+                return vuelo.resultado
+            except BaseException as e:
+                vuelo.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._vuelos[clave]
+                vuelo.listo.set()
+
+        if not vuelo.listo.wait(self.plazo):
+            self.vencidas += 1
+            return funcion()
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado
+
+
+def init_app(app):
+    """Crea el pool de conexiones de la app a partir de su configuración"""
+    config = app.config
+    app.extensions['db_pool'] = ConnectionPool(
+        connect_kwargs=dict(
+            host=config['MYSQL_HOST'],
+            user=config['MYSQL_USER'],
+            password=config['MYSQL_PASSWORD'],
+            database=config['MYSQL_DATABASE'],
+            port=int(config['MYSQL_PORT']),
+            cursorclass=TimedDictCursor,
+            connect_timeout=5
+        ),
+        min_size=int(config['DB_POOL_MIN']),
+        max_size=int(config['DB_POOL_MAX']),
+        timeout=float(config['DB_POOL_TIMEOUT']),
+        recycle=float(config['DB_POOL_RECYCLE'])
+    )
+    app.extensions['db_vuelos'] = (
+        SingleFlight(float(config['DB_COALESCER_PLAZO'])) if config['DB_COALESCER'] else None
+    )
+
+
+def get_pool():
+    """Devuelve el pool de conexiones de la app actual"""
+    return current_app.extensions['db_pool']
+
+
+def get_db_connection():
+    """Obtiene una conexión a MySQL del pool; close() la devuelve al pool"""
+    return get_pool().acquire()
+
+
+def _leer(sql, args, uno):
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, args)
+            return cursor.fetchone() if uno else cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def leer_compartido(sql, args=None, uno=False):
+    """
+    Ejecuta una consulta de lectura fuera de transacción (fetchall, o fetchone con uno=True)
+    compartiendo la ejecución con las peticiones concurrentes que piden la misma consulta.
+    Cada solicitante recibe sus propias copias de las filas, que puede modificar libremente.
+    """
+    vuelos = current_app.extensions.get('db_vuelos')
+    if vuelos is None:
+        return _leer(sql, args, uno)
+    clave = (vuelos.epoca, sql, tuple(args) if isinstance(args, (list, tuple)) else args, uno)
+    resultado = vuelos.hacer(clave, lambda: _leer(sql, args, uno))
+    if resultado is None:
+        return None
+    return dict(resultado) if uno else [dict(fila) for fila in resultado]
+
+
+def registrar_escritura():
+    """
+    Avisa que se confirmó una escritura: las lecturas compartidas que empiecen a partir de
+    ahora ejecutan una consulta nueva en lugar de sumarse a una anterior a la escritura.
+    """
+    vuelos = current_app.extensions.get('db_vuelos')
+    if vuelos is not None:
+        vuelos.nueva_epoca()
@@ -0,0 +1,349 @@
+"""
+Propósito: Mantiene un resumen incremental de estadísticas de productos por categoría.
+Funcionalidad: La tabla categoria_stats guarda, por categoría, el número de productos, la suma,
+el mínimo y el máximo de precio y los últimos productos agregados. Las rutas de productos llaman
+a registrar_alta/registrar_baja/registrar_cambio dentro de su misma transacción, de modo que
+GET /categorias/stats lee una fila por categoría en lugar de agregar toda la tabla productos.
+La tabla se crea y se llena automáticamente en el calentamiento del primer worker que arranca
+sin ella (ver calentamiento.py); el comando `flask stats rebuild` reconcilia cualquier
+desviación recalculando el resumen desde productos, también con tráfico en curso.
+"""
+
+import json
+from decimal import Decimal
+
+import click
+from flask.cli import AppGroup
+
+from .db import get_db_connection
+
+# Número de productos recientes que se guardan por categoría
+ULTIMOS_N = 5
+
+CREATE_TABLE_SQL = """CREATE TABLE IF NOT EXISTS categoria_stats (
+    categoria_id INT NOT NULL PRIMARY KEY,
+    total INT NOT NULL DEFAULT 0,
+    suma_precio DECIMAL(14,2) NOT NULL DEFAULT 0,
+    min_precio DECIMAL(10,2) NULL,
+    max_precio DECIMAL(10,2) NULL,
+    ultimos_productos TEXT NULL,
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+stats_cli = AppGroup('stats', help='Mantenimiento del resumen de estadísticas por categoría.')
+
+
+def _decimal(valor):
+    return None if valor is None else Decimal(str(valor))
+
+
+def _resumen_producto(producto):
+    precio = producto.get('precio')
+    return {
+        "id": producto['id'],
+        "nombre": producto['nombre'],
+        "precio": None if precio is None else float(precio)
+    }
+
+
+def _bloquear(cursor, categoria_id):
+    """Lee (y bloquea hasta el commit) la fila de resumen de una categoría, creándola si falta"""
+    # Un FOR UPDATE sobre una fila inexistente toma un gap lock y dos primeras altas concurrentes
+    # en la misma categoría se bloquean mutuamente. Crear la fila antes evita ese caso; con
+    # ON DUPLICATE KEY UPDATE la fila existente queda con lock exclusivo desde el primer paso
+    # (INSERT IGNORE tomaría uno compartido y el FOR UPDATE posterior podría volver a chocar).
+    cursor.execute(
+        """INSERT INTO categoria_stats (categoria_id) VALUES (%s)
+        ON DUPLICATE KEY UPDATE categoria_id = categoria_id""",
+        (categoria_id,)
+    )
+    cursor.execute(
+        "SELECT * FROM categoria_stats WHERE categoria_id = %s FOR UPDATE",
+        (categoria_id,)
+    )
+    fila = cursor.fetchone()
+    fila['ultimos'] = json.loads(fila['ultimos_productos'] or '[]')
+    return fila
+
+
+def _guardar(cursor, fila):
+    cursor.execute(
+        """INSERT INTO categoria_stats
+        (categoria_id, total, suma_precio, min_precio, max_precio, ultimos_productos)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+        total = VALUES(total),
+        suma_precio = VALUES(suma_precio),
+        min_precio = VALUES(min_precio),
+        max_precio = VALUES(max_precio),
+        ultimos_productos = VALUES(ultimos_productos)""",
+        (fila['categoria_id'], fila['total'], fila['suma_precio'], fila['min_precio'],
+         fila['max_precio'], json.dumps(fila['ultimos'], ensure_ascii=False))
+    )
+
+
+def _recalcular_rango(cursor, fila):
+    """Recalcula mínimo y máximo de una categoría usando el índice de categoria_id"""
+    cursor.execute(
+        "SELECT MIN(precio) AS min_precio, MAX(precio) AS max_precio FROM productos WHERE categoria_id = %s",
+        (fila['categoria_id'],)
+    )
+    rango = cursor.fetchone()
+    fila['min_precio'], fila['max_precio'] = rango['min_precio'], rango['max_precio']
+
+
+def _recalcular_ultimos(cursor, fila):
+    """Relee los últimos productos de una categoría (ORDER BY id DESC LIMIT sobre el índice)"""
+    cursor.execute(
+        """SELECT id, nombre, precio FROM productos
+        WHERE categoria_id = %s ORDER BY id DESC LIMIT %s""",
+        (fila['categoria_id'], ULTIMOS_N)
+    )
+    fila['ultimos'] = [_resumen_producto(p) for p in cursor.fetchall()]
+
+
+def _sumar(fila, producto):
+    precio = _decimal(producto.get('precio'))
+    fila['total'] += 1
+    if precio is not None:
+        fila['suma_precio'] += precio
+        fila['min_precio'] = precio if fila['min_precio'] is None else min(fila['min_precio'], precio)
+        fila['max_precio'] = precio if fila['max_precio'] is None else max(fila['max_precio'], precio)
+
+
+def _ampliar(fila, producto):
+    _sumar(fila, producto)
+    ultimos = [p for p in fila['ultimos'] if p['id'] != producto['id']]
+    ultimos.append(_resumen_producto(producto))
+    ultimos.sort(key=lambda p: p['id'], reverse=True)
+    fila['ultimos'] = ultimos[:ULTIMOS_N]
+
+
+def _reducir(cursor, fila, producto):
+    precio = _decimal(producto.get('precio'))
+    fila['total'] = max(fila['total'] - 1, 0)
+    if precio is not None:
+        fila['suma_precio'] -= precio
+        if precio in (fila['min_precio'], fila['max_precio']):
+            _recalcular_rango(cursor, fila)
+    if fila['total'] == 0:
+        fila['suma_precio'], fila['min_precio'], fila['max_precio'] = Decimal(0), None, None
+    if any(p['id'] == producto['id'] for p in fila['ultimos']):
+        _recalcular_ultimos(cursor, fila)
+
+
+def registrar_alta(cursor, producto):
+    """Suma un producto recién insertado al resumen de su categoría"""
+    if not producto.get('categoria_id'):
+        return
+    fila = _bloquear(cursor, producto['categoria_id'])
+    _ampliar(fila, producto)
+    _guardar(cursor, fila)
+
+
+def registrar_altas_lote(cursor, productos):
+    """
+    Suma un lote de productos recién insertados (sin id conocido) al resumen, bloqueando
+    cada categoría una sola vez y releyendo sus últimos productos desde el índice.
+    """
+    por_categoria = {}
+    for producto in productos:
+        if producto.get('categoria_id'):
+            por_categoria.setdefault(producto['categoria_id'], []).append(producto)
+
+    for categoria_id in sorted(por_categoria):
+        fila = _bloquear(cursor, categoria_id)
+        for producto in por_categoria[categoria_id]:
+            _sumar(fila, producto)
+        _recalcular_ultimos(cursor, fila)
+        _guardar(cursor, fila)
+
+
+def registrar_baja(cursor, producto):
+    """Resta un producto ya eliminado del resumen de su categoría"""
+    if not producto.get('categoria_id'):
+        return
+    fila = _bloquear(cursor, producto['categoria_id'])
+    _reducir(cursor, fila, producto)
+    _guardar(cursor, fila)
+
+
+def registrar_cambio(cursor, anterior, nuevo):
+    """Aplica la actualización de un producto (incluido el cambio de categoría) al resumen"""
+    if anterior.get('categoria_id') != nuevo.get('categoria_id'):
+        # Bloquea ambas filas en orden de id para no cruzarse con un cambio en sentido contrario
+        for categoria_id in sorted(c for c in (anterior.get('categoria_id'), nuevo.get('categoria_id')) if c):
+            _bloquear(cursor, categoria_id)
+        registrar_baja(cursor, anterior)
+        registrar_alta(cursor, nuevo)
+        return
+    if not nuevo.get('categoria_id'):
+        return
+
+    fila = _bloquear(cursor, nuevo['categoria_id'])
+    precio_anterior = _decimal(anterior.get('precio'))
+    precio_nuevo = _decimal(nuevo.get('precio'))
+    fila['suma_precio'] += (precio_nuevo or 0) - (precio_anterior or 0)
+    if precio_anterior is not None and precio_anterior in (fila['min_precio'], fila['max_precio']):
+        _recalcular_rango(cursor, fila)
+    elif precio_nuevo is not None:
+        fila['min_precio'] = precio_nuevo if fila['min_precio'] is None else min(fila['min_precio'], precio_nuevo)
+        fila['max_precio'] = precio_nuevo if fila['max_precio'] is None else max(fila['max_precio'], precio_nuevo)
+    fila['ultimos'] = [
+        _resumen_producto(nuevo) if p['id'] == nuevo['id'] else p for p in fila['ultimos']
+    ]
+    _guardar(cursor, fila)
+
+
+def eliminar_categoria(cursor, categoria_id):
+    """Descarta el resumen de una categoría eliminada"""
+    cursor.execute("DELETE FROM categoria_stats WHERE categoria_id = %s", (categoria_id,))
+
+
+# Columnas necesarias para cada campo de la respuesta de estadísticas
+_COLUMNAS_CAMPO = {
+    "categoria_id": ("c.id",),
+    "nombre": ("c.nombre",),
+    "total_productos": ("s.total",),
+    "precio_min": ("s.min_precio",),
+    "precio_max": ("s.max_precio",),
+    "precio_promedio": ("s.total", "s.suma_precio"),
+    "ultimos_productos": ("s.ultimos_productos",),
+}
+
+_VALOR_CAMPO = {
+    "categoria_id": lambda fila: fila['id'],
+    "nombre": lambda fila: fila['nombre'],
+    "total_productos": lambda fila: fila['total'] or 0,
+    "precio_min": lambda fila: None if fila['min_precio'] is None else float(fila['min_precio']),
+    "precio_max": lambda fila: None if fila['max_precio'] is None else float(fila['max_precio']),
+    "precio_promedio": lambda fila: (
+        round(float(fila['suma_precio']) / fila['total'], 2) if fila['total'] else None
+    ),
+    "ultimos_productos": lambda fila: json.loads(fila['ultimos_productos'] or '[]'),
+}
+
+
+def _select_stats(campos):
+    """Arma el SELECT leyendo sólo las columnas que necesitan los campos pedidos"""
+    columnas = list(dict.fromkeys(c for campo in campos for c in _COLUMNAS_CAMPO[campo]))
+    return (f"SELECT {', '.join(columnas)} "
+            "FROM categoria c LEFT JOIN categoria_stats s ON s.categoria_id = c.id")
+
+
+def _formatear(fila, campos):
+    return {campo: _VALOR_CAMPO[campo](fila) for campo in campos}
+
+
+def obtener_todas(cursor, campos=None):
+    """Devuelve las estadísticas de todas las categorías (sólo los campos pedidos)"""
+    campos = campos or list(_COLUMNAS_CAMPO)
+    cursor.execute(_select_stats(campos) + " ORDER BY c.id")
+    return [_formatear(fila, campos) for fila in cursor.fetchall()]
+
+
+def obtener(cursor, categoria_id, campos=None):
+    """Devuelve las estadísticas de una categoría o None si no existe"""
+    campos = campos or list(_COLUMNAS_CAMPO)
+    cursor.execute(_select_stats(campos) + " WHERE c.id = %s", (categoria_id,))
+    fila = cursor.fetchone()
+    return _formatear(fila, campos) if fila else None
+
+
+def _asegurar_indice(cursor):
+    """Crea el índice (categoria_id, id) sobre productos si aún no existe"""
+    cursor.execute(
+        """SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'productos'
+        AND column_name = 'categoria_id' AND seq_in_index = 1 LIMIT 1"""
+    )
+    if not cursor.fetchone():
+        cursor.execute("CREATE INDEX idx_productos_categoria ON productos (categoria_id, id)")
+
+
+def _agregados(cursor, categoria_id):
+    """Calcula total, suma, mínimo y máximo de precio de una categoría desde productos"""
+    cursor.execute(
+        """SELECT COUNT(*) AS total, COALESCE(SUM(precio), 0) AS suma_precio,
+        MIN(precio) AS min_precio, MAX(precio) AS max_precio
+        FROM productos WHERE categoria_id = %s""",
+        (categoria_id,)
+    )
+    fila = cursor.fetchone()
+    fila['categoria_id'] = categoria_id
+    return fila
+
+
+def reconstruir(connection):
+    """
+    Recalcula el resumen de cada categoría desde productos y corrige las filas que difieran.
+    Cada categoría se recalcula en su propia transacción bajo el lock de su fila de resumen,
+    que las escrituras de productos también toman antes de confirmar: el lock se obtiene antes
+    de la primera lectura consistente, así que la lectura de productos incluye todo lo ya
+    confirmado y ninguna escritura puede confirmarse entre esa lectura y el guardado.
+    Devuelve el número de categorías corregidas.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        _asegurar_indice(cursor)
+
+        cursor.execute(
+            """SELECT id AS categoria_id FROM categoria
+            UNION SELECT DISTINCT categoria_id FROM productos WHERE categoria_id IS NOT NULL
+            UNION SELECT categoria_id FROM categoria_stats"""
+        )
+        categorias = sorted(fila['categoria_id'] for fila in cursor.fetchall())
+        connection.commit()
+
+        corregidas = 0
+        campos = ('total', 'suma_precio', 'min_precio', 'max_precio')
+        for categoria_id in categorias:
+            previa = _bloquear(cursor, categoria_id)
+            cursor.execute("SELECT 1 FROM categoria WHERE id = %s", (categoria_id,))
+            existe = cursor.fetchone() is not None
+            fila = _agregados(cursor, categoria_id)
+            _recalcular_ultimos(cursor, fila)
+
+            if not existe and fila['total'] == 0:
+                # Resumen de una categoría eliminada sin productos que la referencien
+                eliminar_categoria(cursor, categoria_id)
+                corregidas += 1 if previa['total'] else 0
+            elif not (all(previa[c] == fila[c] for c in campos) and previa['ultimos'] == fila['ultimos']):
+                _guardar(cursor, fila)
+                corregidas += 1
+            connection.commit()
+    return corregidas
+
+
+def asegurar_tabla(connection):
+    """
+    Crea y llena categoria_stats si todavía no existe (primer arranque tras desplegar).
+    Devuelve True si la tuvo que crear. El llamador debe serializarla entre workers.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """SELECT 1 FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = 'categoria_stats'"""
+        )
+        existe = cursor.fetchone() is not None
+    connection.commit()
+    if existe:
+        return False
+    reconstruir(connection)
+    return True
+
+
+@stats_cli.command('rebuild')
+def rebuild_command():
+    """Crea/reconcilia la tabla categoria_stats a partir de productos."""
+    connection = get_db_connection()
+    try:
+        corregidas = reconstruir(connection)
+    finally:
+        connection.close()
+    click.echo(f"Resumen de categorías reconstruido: {corregidas} categorías corregidas")
+
+
+def init_app(app):
+    """Registra el comando `flask stats` en la app"""
+    app.cli.add_command(stats_cli)
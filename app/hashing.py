@@ -0,0 +1,33 @@
+"""
+Propósito: Agrupa el hasheo y la verificación de contraseñas con bcrypt.
+Funcionalidad: bcrypt consume ~250 ms de CPU por llamada. Con workers sync/gthread se ejecuta
+directamente; cuando gevent ha parcheado la librería estándar se delega al threadpool nativo
+del hub de gevent para no congelar el bucle de eventos (y con él todas las demás peticiones
+del worker) mientras se calcula el hash. bcrypt se importa en el primer uso para no cargarlo
+durante el arranque del worker.
+"""
+
+
+def _run_off_loop(func, *args):
+    """Ejecuta func en el threadpool de gevent si está activo; si no, en el hilo actual"""
+    try:
+        from gevent import monkey, get_hub
+    except ImportError:
+        return func(*args)
+    if not monkey.is_module_patched('socket'):
+        return func(*args)
+    return get_hub().threadpool.apply(func, args)
+
+
+def hash_password(contrasena):
+    """Devuelve el hash bcrypt de la contraseña en texto plano"""
+    import bcrypt
+    return _run_off_loop(bcrypt.hashpw, contrasena.encode('utf-8'), bcrypt.gensalt())
+
+
+def check_password(contrasena, hashed):
+    """Verifica una contraseña en texto plano contra su hash bcrypt"""
+    import bcrypt
+    if isinstance(hashed, str):
+        hashed = hashed.encode('utf-8')
+    return _run_off_loop(bcrypt.checkpw, contrasena.encode('utf-8'), hashed)
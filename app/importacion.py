@@ -0,0 +1,230 @@
+"""
+Propósito: Importación masiva de productos desde CSV o NDJSON.
+Funcionalidad: Lee el archivo como flujo de texto fila por fila (sin cargarlo completo en memoria),
+valida las filas en lotes de IMPORT_LOTE, resuelve las categorías de cada lote con una sola
+consulta, inserta el lote con executemany y lo confirma en su propia transacción junto con el
+resumen de estadísticas. Devuelve un reporte con los errores por fila, acotado a
+IMPORT_MAX_ERRORES entradas para que la memoria se mantenga constante con archivos de cualquier
+tamaño.
+"""
+
+import csv
+import io
+import json
+import math
+from itertools import islice
+
+from flask import current_app
+import pymysql
+
+from . import estadisticas, propagacion
+
+FORMATOS = ('csv', 'ndjson')
+
+_INSERT_SQL = """INSERT INTO productos
+    (nombre, precio, descripcion, categoria_id, nombre_categoria)
+    VALUES (%s, %s, %s, %s, %s)"""
+
+
+class ResultadoImportacion:
+    """Acumula el progreso y los errores por fila de una importación"""
+
+    def __init__(self, max_errores):
+        self.max_errores = max_errores
+        self.procesadas = 0
+        self.insertadas = 0
+        self.con_error = 0
+        self.errores = []
+        self.interrumpida = None
+
+    def error(self, fila, mensaje):
+        self.con_error += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append({"fila": fila, "error": mensaje})
+
+    @classmethod
+    def from_dict(cls, datos, max_errores):
+        """Reconstruye el progreso guardado en un punto de control"""
+        resultado = cls(max_errores)
+        resultado.procesadas = datos.get('procesadas', 0)
+        resultado.insertadas = datos.get('insertadas', 0)
+        resultado.con_error = datos.get('con_error', 0)
+        resultado.errores = list(datos.get('errores', []))
+        return resultado
+
+    def to_dict(self):
+        datos = {
+            "procesadas": self.procesadas,
+            "insertadas": self.insertadas,
+            "con_error": self.con_error,
+            "errores": self.errores,
+            "errores_omitidos": self.con_error - len(self.errores)
+        }
+        if self.interrumpida:
+            datos["interrumpida"] = self.interrumpida
+        return datos
+
+
+def detectar_formato(content_type, formato=None):
+    """Determina el formato a partir del parámetro explícito o del Content-Type"""
+    if formato:
+        return formato.lower() if formato.lower() in FORMATOS else None
+    content_type = (content_type or '').lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type or 'json-seq' in content_type:
+        return 'ndjson'
+    return None
+
+
+def abrir_texto(stream):
+    """Envuelve un flujo binario como texto UTF-8 (ignorando BOM) sin leerlo completo"""
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def _leer_csv(texto):
+    for numero, registro in enumerate(csv.DictReader(texto), start=1):
+        yield numero, registro
+
+
+def _leer_ndjson(texto):
+    for numero, linea in enumerate(texto, start=1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError as e:
+            registro = e
+        yield numero, registro
+
+
+def _normalizar(registro):
+    """Valida un registro y devuelve (producto, None) o (None, mensaje de error)"""
+    if isinstance(registro, Exception):
+        return None, f"JSON inválido: {registro}"
+    if not isinstance(registro, dict):
+        return None, "Cada fila debe ser un objeto"
+
+    nombre = registro.get('nombre')
+    precio = registro.get('precio')
+    descripcion = registro.get('descripcion')
+    categoria_id = registro.get('categoria_id')
+    if categoria_id in (None, '') and isinstance(registro.get('categoria'), dict):
+        categoria_id = registro['categoria'].get('id')
+
+    if nombre is not None and not isinstance(nombre, str):
+        return None, "El nombre debe ser texto"
+    if descripcion is not None and not isinstance(descripcion, str):
+        return None, "La descripción debe ser texto"
+    nombre = (nombre or '').strip()
+    if not nombre or precio in (None, ''):
+        return None, "Nombre y precio son requeridos"
+    if isinstance(precio, bool) or not isinstance(precio, (str, int, float)):
+        return None, "El precio debe ser un número"
+    try:
+        precio = float(precio)
+        categoria_id = int(categoria_id) if categoria_id not in (None, '') else None
+    except (ValueError, TypeError) as e:
+        return None, f"Datos inválidos: {e}"
+    if not math.isfinite(precio):
+        return None, "El precio debe ser un número finito"
+
+    return {
+        "nombre": nombre,
+        "precio": precio,
+        "descripcion": descripcion or '',
+        "categoria_id": categoria_id
+    }, None
+
+
+def _nombres_categorias(cursor, ids):
+    """Resuelve con una sola consulta las categorías referenciadas por un lote"""
+    if not ids:
+        return {}
+    marcadores = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"SELECT id, nombre FROM categoria WHERE id IN ({marcadores})", tuple(ids))
+    return {fila['id']: fila['nombre'] for fila in cursor.fetchall()}
+
+
+def _insertar_lote(connection, lote, resultado, al_confirmar=None):
+    """
+    Valida, inserta y confirma un lote de (numero_fila, registro).
+    al_confirmar(cursor, resultado) se ejecuta dentro de la transacción del lote, ya con el
+    progreso actualizado, justo antes del commit.
+    """
+    validos = []
+    for numero, registro in lote:
+        producto, error = _normalizar(registro)
+        if error:
+            resultado.error(numero, error)
+        else:
+            validos.append((numero, producto))
+
+    with connection.cursor() as cursor:
+        nombres = _nombres_categorias(
+            cursor, {p['categoria_id'] for _, p in validos if p['categoria_id']}
+        )
+        copia = propagacion.copia_activa()
+        filas, productos = [], []
+        for numero, producto in validos:
+            categoria_id = producto['categoria_id']
+            if categoria_id and categoria_id not in nombres:
+                resultado.error(numero, "Categoría no encontrada")
+                continue
+            nombre_categoria = nombres.get(categoria_id, '') if copia else ''
+            filas.append((producto['nombre'], producto['precio'], producto['descripcion'],
+                          categoria_id, nombre_categoria))
+            productos.append(producto)
+
+        if filas:
+            cursor.executemany(_INSERT_SQL, filas)
+            estadisticas.registrar_altas_lote(cursor, productos)
+
+        resultado.procesadas += len(lote)
+        resultado.insertadas += len(filas)
+        try:
+            if al_confirmar:
+                al_confirmar(cursor, resultado)
+            connection.commit()
+        except pymysql.Error:
+            resultado.procesadas -= len(lote)
+            resultado.insertadas -= len(filas)
+            raise
+
+
+def importar(connection, texto, formato, tamano_lote=None, max_errores=None,
+             resultado=None, al_confirmar=None, entre_lotes=None):
+    """
+    Importa productos desde el flujo de texto dado, confirmando cada lote por separado.
+    Si falla la base de datos se detiene: los lotes anteriores quedan confirmados y el
+    resultado queda marcado como interrumpido.
+
+    Para reanudar una importación se pasa el resultado guardado: se omiten las
+    resultado.procesadas filas ya confirmadas. entre_lotes(resultado) se llama antes de cada
+    lote (p. ej. para atender una cancelación).
+    """
+    config = current_app.config
+    tamano_lote = tamano_lote or int(config['IMPORT_LOTE'])
+    if resultado is None:
+        resultado = ResultadoImportacion(max_errores or int(config['IMPORT_MAX_ERRORES']))
+    registros = _leer_csv(texto) if formato == 'csv' else _leer_ndjson(texto)
+    registros = islice(registros, resultado.procesadas, None)
+
+    try:
+        while True:
+            if entre_lotes:
+                entre_lotes(resultado)
+            lote = list(islice(registros, tamano_lote))
+            if not lote:
+                break
+            _insertar_lote(connection, lote, resultado, al_confirmar)
+    except (csv.Error, UnicodeDecodeError) as e:
+        resultado.error(resultado.procesadas + 1, f"Archivo inválido: {e}")
+    except pymysql.Error as err:
+        connection.rollback()
+        current_app.logger.error("Error al importar productos (lote tras fila %s): %s",
+                                 resultado.procesadas, err)
+        resultado.interrumpida = "Error de base de datos; los lotes anteriores quedaron guardados"
+    return resultado
@@ -0,0 +1,174 @@
+"""
+Propósito: Limita los intentos de inicio de sesión para frenar fuerza bruta y credential stuffing.
+Funcionalidad: Cada intento consume una ficha de dos cubetas (token bucket): una por número de
+usuario y otra por IP del cliente. Las cubetas se guardan en un archivo SQLite local, de modo que
+todos los workers de gunicorn de la máquina comparten los mismos contadores. /auth/login consulta
+el limitador antes de tocar MySQL o bcrypt y responde 429 con Retry-After cuando alguna cubeta
+está vacía; un inicio de sesión correcto rellena la cubeta del número.
+"""
+
+import math
+import os
+import tempfile
+import threading
+import time
+
+from flask import current_app, request
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS cubetas (
+    clave TEXT PRIMARY KEY,
+    fichas REAL NOT NULL,
+    actualizado REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Cada cuántos intentos se purgan las cubetas que ya se rellenaron por completo
+PURGA_CADA = 1000
+
+
+class Cubeta:
+    """Capacidad y ritmo de recarga (fichas por segundo) de un tipo de clave"""
+
+    def __init__(self, capacidad, ventana):
+        self.capacidad = float(capacidad)
+        self.tasa = self.capacidad / float(ventana)
+
+
+class LimitadorLogin:
+    """Token buckets por número e IP persistidos en SQLite y compartidos entre procesos"""
+
+    def __init__(self, ruta, por_numero, por_ip):
+        self.ruta = ruta
+        self.cubetas = {'numero': por_numero, 'ip': por_ip}
+        self._conexion_proceso = None
+        # Serializa el uso de la conexión entre los hilos (o greenlets con gevent) del proceso
+        self._lock = threading.Lock()
+        self._intentos = 0
+
+    def _conexion(self):
+        """Conexión SQLite del proceso, abierta y preparada una sola vez; requiere self._lock"""
+        if self._conexion_proceso is None:
+            import sqlite3  # Se carga con el primer intento de login, no al arrancar
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None,
+                                       check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            # Son contadores efímeros: no hace falta fsync en cada intento
+            conexion.execute("PRAGMA synchronous=OFF")
+            conexion.execute(CREATE_TABLE_SQL)
+            self._conexion_proceso = conexion
+        return self._conexion_proceso
+
+    def _rellenar(self, fila, cubeta, ahora):
+        if fila is None:
+            return cubeta.capacidad
+        fichas, actualizado = fila
+        return min(cubeta.capacidad, fichas + (ahora - actualizado) * cubeta.tasa)
+
+    def consumir(self, claves):
+        """
+        Intenta consumir una ficha de cada cubeta {tipo: clave}. Devuelve 0 si el intento
+        se permite o los segundos que faltan para que vuelva a haber fichas en todas.
+        """
+        with self._lock:
+            conexion = self._conexion()
+            ahora = time.time()
+            # BEGIN IMMEDIATE toma el lock de escritura: leer y descontar es atómico entre workers
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                estado = {}
+                for tipo, clave in claves.items():
+                    fila = conexion.execute(
+                        "SELECT fichas, actualizado FROM cubetas WHERE clave = ?", (clave,)
+                    ).fetchone()
+                    estado[clave] = (self.cubetas[tipo], self._rellenar(fila, self.cubetas[tipo], ahora))
+
+                espera = max((1 - fichas) / cubeta.tasa for cubeta, fichas in estado.values())
+                if espera <= 0:
+                    conexion.executemany(
+                        "INSERT OR REPLACE INTO cubetas (clave, fichas, actualizado) VALUES (?, ?, ?)",
+                        [(clave, fichas - 1, ahora) for clave, (_, fichas) in estado.items()]
+                    )
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            self._intentos += 1
+            purgar = self._intentos % PURGA_CADA == 0
+
+        if purgar:
+            self.purgar()
+        return max(0, espera)
+
+    def reiniciar(self, clave):
+        """Rellena la cubeta de una clave (p. ej. tras un inicio de sesión correcto)"""
+        with self._lock:
+            self._conexion().execute("DELETE FROM cubetas WHERE clave = ?", (clave,))
+
+    def purgar(self):
+        """Elimina las cubetas que ya estarían llenas (equivalen a no tener fila)"""
+        ahora = time.time()
+        with self._lock:
+            conexion = self._conexion()
+            for cubeta in self.cubetas.values():
+                conexion.execute(
+                    "DELETE FROM cubetas WHERE fichas + (? - actualizado) * ? >= ?",
+                    (ahora, cubeta.tasa, cubeta.capacidad)
+                )
+
+
+def init_app(app):
+    """Crea el limitador de /auth/login si LOGIN_LIMITE_HABILITADO está activo"""
+    if not app.config['LOGIN_LIMITE_HABILITADO']:
+        app.extensions['limite_login'] = None
+        return
+    ventana = float(app.config['LOGIN_LIMITE_VENTANA'])
+    app.extensions['limite_login'] = LimitadorLogin(
+        app.config['LOGIN_LIMITE_DB'] or os.path.join(tempfile.gettempdir(), 'login_limite.sqlite3'),
+        por_numero=Cubeta(app.config['LOGIN_LIMITE_NUMERO'], ventana),
+        por_ip=Cubeta(app.config['LOGIN_LIMITE_IP'], ventana),
+    )
+
+
+def ip_cliente():
+    """
+    IP del cliente. Con LOGIN_PROXIES=0 (por defecto) es la dirección de la conexión; sólo con
+    proxies de confianza delante se toma de X-Forwarded-For, que el cliente puede falsificar
+    """
+    proxies = int(current_app.config['LOGIN_PROXIES'])
+    if proxies > 0:
+        reenviadas = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',')
+                      if ip.strip()]
+        if len(reenviadas) >= proxies:
+            return reenviadas[-proxies]
+    return request.remote_addr or ''
+
+
+def verificar_intento(numero):
+    """
+    Registra un intento de login para el número y la IP actuales. Devuelve los segundos
+    (enteros) que el cliente debe esperar, o 0 si el intento puede continuar.
+    """
+    limitador = current_app.extensions.get('limite_login')
+    if limitador is None:
+        return 0
+    import sqlite3
+    try:
+        espera = limitador.consumir({'numero': f"n:{numero}", 'ip': f"ip:{ip_cliente()}"})
+    except sqlite3.Error as err:
+        # Si el almacén local falla no se bloquea el login; sólo se pierde la protección
+        current_app.logger.error("Error en el limitador de login: %s", err)
+        return 0
+    return math.ceil(espera)
+
+
+def login_correcto(numero):
+    """Devuelve al número sus intentos tras autenticarse correctamente"""
+    limitador = current_app.extensions.get('limite_login')
+    if limitador is None:
+        return
+    import sqlite3
+    try:
+        limitador.reiniciar(f"n:{numero}")
+    except sqlite3.Error as err:
+        current_app.logger.error("Error en el limitador de login: %s", err)
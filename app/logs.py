@@ -0,0 +1,146 @@
+"""
+Propósito: Configura el registro (logging) de la aplicación.
+Funcionalidad: Los hilos de petición sólo encolan los registros mediante un QueueHandler; un
+QueueListener en segundo plano los formatea como JSON (una línea por evento) y los escribe en
+stdout, de modo que ninguna petición se bloquea esperando E/S de logs. Además emite un log de
+acceso estructurado por petición (incluidas las que terminan en una excepción no manejada) con
+ruta, estado, latencia, tiempo en MySQL e id de usuario tomado del JWT.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+from flask_jwt_extended import get_jwt_identity
+
+access_logger = logging.getLogger('app.access')
+
+_listener = None
+
+# Atributos propios de LogRecord; el resto se consideran campos estructurados (extra=...)
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Encola el registro resolviendo sólo el mensaje; el formateo JSON ocurre en el listener"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def add_db_time(elapsed):
+    """Acumula segundos de consulta a MySQL en la petición actual"""
+    if has_request_context():
+        g.db_time = g.get('db_time', 0.0) + elapsed
+
+
+def _current_user_id():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # La ruta no verificó ningún JWT
+        return None
+
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+    g.db_time = 0.0
+
+
+def _record_status(response):
+    g.response_status = response.status_code
+    return response
+
+
+def _log_access(exc):
+    """
+    Se ejecuta en teardown_request, que corre también cuando la vista lanza una excepción no
+    manejada (caso en que after_request puede no llegar a ejecutarse).
+    """
+    start = g.pop('request_start', None)
+    if start is None:
+        return
+    # Sin respuesta registrada la petición terminó en una excepción no manejada
+    status = g.get('response_status', 500)
+    extra = {
+        "method": request.method,
+        "route": request.url_rule.rule if request.url_rule else request.path,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "db_ms": round(g.get('db_time', 0.0) * 1000, 2),
+        "user_id": _current_user_id(),
+    }
+    if exc is not None:
+        extra["error"] = f"{type(exc).__name__}: {exc}"
+    access_logger.info("%s %s %s", request.method, request.path, status, extra=extra)
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def init_app(app):
+    """Instala el QueueHandler/QueueListener y los hooks del log de acceso en la app"""
+    global _listener
+    _stop_listener()
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, _NonBlockingQueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(_NonBlockingQueueHandler(log_queue))
+    root.setLevel(app.config['LOG_LEVEL'].upper())
+
+    # Los logs de la app se propagan al root en lugar de escribirse directamente a stderr
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(app.config['LOG_LEVEL'].upper())
+
+    access_logger.disabled = not app.config['ACCESS_LOG']
+    if app.config['ACCESS_LOG']:
+        app.before_request(_start_timer)
+        app.after_request(_record_status)
+        app.teardown_request(_log_access)
@@ -0,0 +1,88 @@
+"""
+Propósito: Propaga cambios de una categoría a la copia desnormalizada en productos.
+Funcionalidad: productos.nombre_categoria guarda una copia del nombre de la categoría. Al
+renombrar o eliminar una categoría se actualizan los productos afectados en lotes de
+PROPAGACION_LOTE filas (UPDATE ... LIMIT sobre el índice de categoria_id), confirmando cada
+lote por separado para no mantener bloqueada una gran parte de la tabla. El índice
+(categoria_id, id) lo crea `flask stats rebuild`. `flask categorias sync-nombres` vuelve a
+copiar todos los nombres (p. ej. al volver de NOMBRE_CATEGORIA_MODO='lectura' a 'copia').
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .db import get_db_connection
+
+categorias_cli = AppGroup('categorias', help='Mantenimiento de la copia de nombres de categoría.')
+
+
+def _actualizar_por_lotes(connection, sql, args, tamano_lote, entre_lotes=None):
+    """Ejecuta sql (que debe terminar en LIMIT %s) hasta que afecte menos filas que un lote"""
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            if entre_lotes:
+                entre_lotes(total)
+            cursor.execute(sql, (*args, tamano_lote))
+            connection.commit()
+            total += cursor.rowcount
+            if cursor.rowcount < tamano_lote:
+                return total
+
+
+def _tamano_lote(tamano_lote):
+    return tamano_lote or int(current_app.config['PROPAGACION_LOTE'])
+
+
+def propagar_renombre(connection, categoria_id, nombre, tamano_lote=None, entre_lotes=None):
+    """Copia el nuevo nombre de la categoría a sus productos; devuelve las filas actualizadas"""
+    return _actualizar_por_lotes(
+        connection,
+        """UPDATE productos SET nombre_categoria = %s
+        WHERE categoria_id = %s AND NOT (nombre_categoria <=> %s)
+        LIMIT %s""",
+        (nombre, categoria_id, nombre),
+        _tamano_lote(tamano_lote),
+        entre_lotes
+    )
+
+
+def desvincular_productos(connection, categoria_id, tamano_lote=None, entre_lotes=None):
+    """Deja sin categoría a los productos de una categoría eliminada; devuelve las filas actualizadas"""
+    return _actualizar_por_lotes(
+        connection,
+        """UPDATE productos SET categoria_id = NULL, nombre_categoria = ''
+        WHERE categoria_id = %s
+        LIMIT %s""",
+        (categoria_id,),
+        _tamano_lote(tamano_lote),
+        entre_lotes
+    )
+
+
+def copia_activa():
+    """Indica si productos.nombre_categoria se mantiene como copia desnormalizada"""
+    return current_app.config['NOMBRE_CATEGORIA_MODO'] == 'copia'
+
+
+@categorias_cli.command('sync-nombres')
+@click.option('--lote', type=int, default=None, help='Filas por UPDATE (por defecto PROPAGACION_LOTE).')
+def sync_nombres_command(lote):
+    """Copia el nombre actual de cada categoría a sus productos."""
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, nombre FROM categoria")
+            categorias = cursor.fetchall()
+        total = sum(
+            propagar_renombre(connection, c['id'], c['nombre'], lote) for c in categorias
+        )
+    finally:
+        connection.close()
+    click.echo(f"Nombres de categoría sincronizados: {total} productos actualizados")
+
+
+def init_app(app):
+    """Registra el comando `flask categorias` en la app"""
+    app.cli.add_command(categorias_cli)
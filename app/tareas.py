@@ -0,0 +1,127 @@
+"""
+Propósito: Define los tipos de trabajo en segundo plano que ofrece la API.
+Funcionalidad: Cada función registrada con @tipo_trabajo recibe el contexto del trabajo, una
+conexión dedicada y sus parámetros, y es idempotente: si un worker muere a mitad de camino el
+trabajo se reintenta y continúa desde su último punto de control (importación) o repite una
+operación que no duplica efectos (propagación, reconstrucción, exportación).
+"""
+
+import json
+import os
+from decimal import Decimal
+
+import pymysql.cursors
+from flask import current_app
+
+from . import estadisticas, importacion, propagacion
+from .cache_respuestas import publicar
+from .trabajos import tipo_trabajo, directorio_archivos, TrabajoCancelado, TrabajoReintentable
+
+
+@tipo_trabajo('importar_productos', concurrencia=2, publico=False)
+def importar_productos(contexto, connection, parametros):
+    """Importa el archivo subido a /productos/import?async=true reanudando desde el punto de control"""
+    ruta = parametros['ruta']
+    max_errores = int(current_app.config['IMPORT_MAX_ERRORES'])
+    resultado = None
+    if contexto.punto_control:
+        resultado = importacion.ResultadoImportacion.from_dict(contexto.punto_control, max_errores)
+
+    tamano = os.path.getsize(ruta) or 1
+    try:
+        with open(ruta, 'rb') as archivo:
+            def al_confirmar(cursor, parcial):
+                # El punto de control se guarda en la misma transacción que el lote
+                contexto.progreso(archivo.tell() * 100 // tamano,
+                                  f"{parcial.procesadas} filas procesadas",
+                                  punto_control=parcial.to_dict(), cursor=cursor)
+
+            resultado = importacion.importar(
+                connection, importacion.abrir_texto(archivo), parametros['formato'],
+                parametros.get('lote'), max_errores, resultado,
+                al_confirmar=al_confirmar,
+                entre_lotes=lambda parcial: contexto.verificar_cancelacion()
+            )
+    except TrabajoCancelado:
+        os.remove(ruta)
+        raise
+    finally:
+        publicar('productos', 'categorias_stats')
+
+    if resultado.interrumpida:
+        # El archivo se conserva para reanudar desde el punto de control en el siguiente intento
+        raise TrabajoReintentable(resultado.interrumpida)
+    os.remove(ruta)
+    return resultado.to_dict()
+
+
+@tipo_trabajo('propagar_categoria', concurrencia=1)
+def propagar_categoria(contexto, connection, parametros):
+    """Copia el nombre actual de una categoría a sus productos o los desvincula si fue eliminada"""
+    categoria_id = int(parametros['categoria_id'])
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nombre FROM categoria WHERE id = %s", (categoria_id,))
+        categoria = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) AS n FROM productos WHERE categoria_id = %s", (categoria_id,))
+        afectados = cursor.fetchone()['n'] or 1
+    connection.commit()
+
+    def entre_lotes(total):
+        contexto.verificar_cancelacion()
+        if total:
+            contexto.progreso(total * 100 // afectados, f"{total} productos actualizados")
+
+    if categoria is None:
+        accion = "desvincular"
+    elif propagacion.copia_activa():
+        accion = "renombrar"
+    else:
+        return {"accion": "ninguna", "productos_actualizados": 0}
+    try:
+        if categoria is None:
+            total = propagacion.desvincular_productos(connection, categoria_id, entre_lotes=entre_lotes)
+        else:
+            total = propagacion.propagar_renombre(
+                connection, categoria_id, categoria['nombre'], entre_lotes=entre_lotes
+            )
+    finally:
+        # También si se cancela a medias: los lotes ya confirmados cambiaron los productos
+        publicar('productos', 'producto')
+    return {"accion": accion, "productos_actualizados": total}
+
+
+@tipo_trabajo('reconstruir_stats', concurrencia=1)
+def reconstruir_stats(contexto, connection, parametros):
+    """Reconstruye categoria_stats y el índice de productos por categoría"""
+    corregidas = estadisticas.reconstruir(connection)
+    publicar('categorias_stats')
+    return {"categorias_corregidas": corregidas}
+
+
+@tipo_trabajo('exportar_productos', concurrencia=1)
+def exportar_productos(contexto, connection, parametros):
+    """Exporta todos los productos a un archivo NDJSON leyendo la tabla como flujo"""
+    nombre = f"productos_{contexto.id}.ndjson"
+    ruta = os.path.join(directorio_archivos(), nombre)
+    filas = 0
+    try:
+        with open(ruta, 'w', encoding='utf-8') as archivo, \
+                connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            cursor.execute("SELECT * FROM productos ORDER BY id")
+            for producto in cursor:
+                archivo.write(json.dumps(
+                    producto, ensure_ascii=False,
+                    default=lambda v: float(v) if isinstance(v, Decimal) else str(v)
+                ) + "\n")
+                filas += 1
+                if filas % 5000 == 0:
+                    # El cursor sin búfer ocupa la conexión: la cancelación se revisa en memoria
+                    if contexto.cancelado():
+                        raise TrabajoCancelado()
+    except BaseException:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        raise
+    connection.commit()
+    return {"archivo": nombre, "filas": filas}
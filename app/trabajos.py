@@ -0,0 +1,509 @@
+"""
+Propósito: Ejecuta en segundo plano las operaciones largas (importaciones, propagación de
+categorías, reconstrucción de estadísticas/índices y exportaciones).
+Funcionalidad: Los trabajos se guardan en la tabla trabajos de MySQL, así que sobreviven a los
+reinicios de los workers. Cada worker de gunicorn arranca (al iniciar el worker) un hilo
+sondeador y un pool acotado de JOBS_MAX_HILOS hilos. El sondeador reclama trabajos pendientes,
+mantiene el latido de los que ejecuta, propaga las cancelaciones y devuelve a la cola los
+trabajos cuyo worker dejó de latir. El límite de concurrencia por tipo se aplica en toda la
+máquina con bloqueos con nombre de MySQL (GET_LOCK), que se liberan solos si el worker muere.
+No requiere ningún broker externo. La tabla se crea sola al calentar el worker (ver
+calentamiento.py) y al arrancar el sondeador; `flask trabajos init` la crea a mano. Los
+archivos subidos y exportados se borran JOBS_RETENCION segundos después de su última escritura,
+salvo los que aún esperan un trabajo pendiente.
+"""
+
+import json
+import os
+import socket
+from collections import Counter
+import tempfile
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+import pymysql
+
+from .db import get_db_connection, get_pool
+
+ESTADOS_FINALES = ('completado', 'fallido', 'cancelado')
+
+CREATE_TABLE_SQL = """CREATE TABLE IF NOT EXISTS trabajos (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    clave_idempotencia VARCHAR(100) NULL,
+    parametros TEXT NULL,
+    progreso TINYINT NOT NULL DEFAULT 0,
+    mensaje VARCHAR(255) NULL,
+    punto_control MEDIUMTEXT NULL,
+    resultado MEDIUMTEXT NULL,
+    error TEXT NULL,
+    intentos INT NOT NULL DEFAULT 0,
+    cancelar TINYINT NOT NULL DEFAULT 0,
+    worker VARCHAR(100) NULL,
+    creado_por VARCHAR(50) NULL,
+    creado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    iniciado TIMESTAMP NULL,
+    terminado TIMESTAMP NULL,
+    latido TIMESTAMP NULL,
+    UNIQUE KEY uq_trabajos_clave (clave_idempotencia),
+    KEY idx_trabajos_estado (estado, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+_COLUMNAS_PUBLICAS = """id, tipo, estado, progreso, mensaje, error, intentos, cancelar,
+    creado_por, creado, iniciado, terminado"""
+
+trabajos_cli = AppGroup('trabajos', help='Administración de trabajos en segundo plano.')
+
+# Tipos de trabajo registrados: nombre -> TipoTrabajo
+TIPOS = {}
+
+
+class TrabajoCancelado(Exception):
+    """Lo lanza un trabajo que detectó una solicitud de cancelación"""
+
+
+class TrabajoReintentable(Exception):
+    """Falla transitoria: el trabajo vuelve a la cola mientras le queden intentos"""
+
+
+class TipoTrabajoInvalido(ValueError):
+    """Se intentó enviar un trabajo de un tipo no registrado o no público"""
+
+
+class TipoTrabajo:
+    def __init__(self, nombre, funcion, concurrencia, publico):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.concurrencia = concurrencia
+        self.publico = publico
+
+
+def tipo_trabajo(nombre, concurrencia=1, publico=True):
+    """
+    Registra una función como tipo de trabajo.
+    La función recibe (contexto, connection, parametros) y devuelve un dict serializable.
+    Debe ser idempotente: tras un reinicio puede ejecutarse de nuevo, con el
+    contexto.punto_control que haya guardado.
+    """
+    def decorador(funcion):
+        TIPOS[nombre] = TipoTrabajo(nombre, funcion, concurrencia, publico)
+        return funcion
+    return decorador
+
+
+class ContextoTrabajo:
+    """Estado de un trabajo en ejecución expuesto a su función"""
+
+    def __init__(self, trabajo, connection):
+        self.id = trabajo['id']
+        self.tipo = trabajo['tipo']
+        self.connection = connection
+        self.punto_control = json.loads(trabajo['punto_control']) if trabajo['punto_control'] else None
+        self._cancelar = threading.Event()
+        if trabajo['cancelar']:
+            self._cancelar.set()
+
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def verificar_cancelacion(self):
+        """Lanza TrabajoCancelado si se pidió cancelar el trabajo"""
+        if self._cancelar.is_set():
+            raise TrabajoCancelado()
+
+    def progreso(self, porcentaje, mensaje=None, punto_control=None, cursor=None):
+        """
+        Registra el avance. Con cursor, la escritura forma parte de la transacción en curso
+        (útil para guardar un punto de control atómico con el lote); sin cursor se confirma
+        de inmediato, por lo que sólo debe llamarse entre transacciones.
+        """
+        sql = "UPDATE trabajos SET progreso = %s, mensaje = %s, latido = NOW()"
+        args = [max(0, min(int(porcentaje), 100)), mensaje]
+        if punto_control is not None:
+            sql += ", punto_control = %s"
+            args.append(json.dumps(punto_control, ensure_ascii=False, default=str))
+        sql += " WHERE id = %s"
+        args.append(self.id)
+        if cursor is not None:
+            cursor.execute(sql, args)
+            return
+        with self.connection.cursor() as propio:
+            propio.execute(sql, args)
+        self.connection.commit()
+
+
+def _formatear(trabajo):
+    for campo in ('creado', 'iniciado', 'terminado'):
+        if trabajo.get(campo) is not None:
+            trabajo[campo] = trabajo[campo].isoformat()
+    trabajo['cancelar'] = bool(trabajo['cancelar'])
+    return trabajo
+
+
+def directorio_archivos():
+    """Directorio local donde se guardan los archivos subidos y generados por los trabajos"""
+    directorio = current_app.config['JOBS_DIR'] or os.path.join(
+        tempfile.gettempdir(), 'tienda_online_trabajos'
+    )
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def asegurar_tabla(connection):
+    """Crea la tabla trabajos si todavía no existe"""
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+    connection.commit()
+
+
+def enviar(cursor, tipo, parametros=None, clave=None, creado_por=None):
+    """
+    Encola un trabajo y devuelve (trabajo, creado). Con clave de idempotencia, un envío
+    repetido devuelve el trabajo existente en lugar de crear otro. La clave es propia de cada
+    usuario: dos usuarios que eligen la misma clave no comparten trabajo.
+    """
+    if tipo not in TIPOS:
+        raise TipoTrabajoInvalido(f"Tipo de trabajo desconocido: {tipo}")
+    if clave is not None:
+        clave = f"{creado_por or ''}:{clave}"
+    creado = True
+    try:
+        cursor.execute(
+            """INSERT INTO trabajos (tipo, clave_idempotencia, parametros, creado_por)
+            VALUES (%s, %s, %s, %s)""",
+            (tipo, clave, json.dumps(parametros or {}, ensure_ascii=False), creado_por)
+        )
+        trabajo_id = cursor.lastrowid
+    except pymysql.IntegrityError:
+        cursor.execute("SELECT id, tipo FROM trabajos WHERE clave_idempotencia = %s", (clave,))
+        existente = cursor.fetchone()
+        if not existente:
+            raise
+        if existente['tipo'] != tipo:
+            raise TipoTrabajoInvalido("La clave de idempotencia ya se usó con otro tipo de trabajo")
+        trabajo_id, creado = existente['id'], False
+    return obtener(cursor, trabajo_id), creado
+
+
+def obtener(cursor, trabajo_id):
+    """Devuelve el estado público de un trabajo o None"""
+    cursor.execute(f"SELECT {_COLUMNAS_PUBLICAS} FROM trabajos WHERE id = %s", (trabajo_id,))
+    trabajo = cursor.fetchone()
+    return _formatear(trabajo) if trabajo else None
+
+
+def listar(cursor, estado=None, limite=50):
+    """Devuelve los trabajos más recientes, opcionalmente filtrados por estado"""
+    sql = f"SELECT {_COLUMNAS_PUBLICAS} FROM trabajos"
+    args = []
+    if estado:
+        sql += " WHERE estado = %s"
+        args.append(estado)
+    sql += " ORDER BY id DESC LIMIT %s"
+    args.append(limite)
+    cursor.execute(sql, args)
+    return [_formatear(t) for t in cursor.fetchall()]
+
+
+def obtener_resultado(cursor, trabajo_id):
+    """Devuelve (estado, resultado) de un trabajo o None si no existe"""
+    cursor.execute("SELECT estado, resultado FROM trabajos WHERE id = %s", (trabajo_id,))
+    fila = cursor.fetchone()
+    if not fila:
+        return None
+    return fila['estado'], json.loads(fila['resultado']) if fila['resultado'] else None
+
+
+def cancelar(cursor, trabajo_id):
+    """
+    Cancela un trabajo: si está pendiente se cancela de inmediato; si se está ejecutando se
+    marca para que el worker lo detenga. Devuelve el estado resultante o None si no existe.
+    """
+    cursor.execute(
+        """UPDATE trabajos SET estado = 'cancelado', terminado = NOW()
+        WHERE id = %s AND estado = 'pendiente'""",
+        (trabajo_id,)
+    )
+    cursor.execute(
+        "UPDATE trabajos SET cancelar = 1 WHERE id = %s AND estado = 'ejecutando'",
+        (trabajo_id,)
+    )
+    return obtener(cursor, trabajo_id)
+
+
+class Ejecutor:
+    """Sondeador y pool de hilos de trabajos de un proceso (worker de gunicorn)"""
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.max_hilos = int(config['JOBS_MAX_HILOS'])
+        self.intervalo = float(config['JOBS_INTERVALO'])
+        self.expira = int(config['JOBS_LATIDO_EXPIRA'])
+        self.max_intentos = int(config['JOBS_MAX_INTENTOS'])
+        self.retencion = float(config['JOBS_RETENCION'])
+        self._proxima_limpieza = 0.0
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._activos = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._iniciado = False
+
+    def iniciar(self):
+        """Arranca el sondeador y el pool (una sola vez por proceso)"""
+        if self._iniciado:
+            return
+        with self._lock:
+            if self._iniciado:
+                return
+            from concurrent.futures import ThreadPoolExecutor  # Sólo en los workers que ejecutan trabajos
+            self._pool = ThreadPoolExecutor(max_workers=self.max_hilos, thread_name_prefix='trabajo')
+            threading.Thread(target=self._sondear, name='trabajos-sondeo', daemon=True).start()
+            self._iniciado = True
+
+    def _conectar(self):
+        """Conexión dedicada (fuera del pool de peticiones) para sondeo o trabajos largos"""
+        with self.app.app_context():
+            return pymysql.connect(**get_pool().connect_kwargs)
+
+    def _sondear(self):
+        connection = None
+        while True:
+            try:
+                if connection is None or not connection.open:
+                    connection = self._conectar()
+                    asegurar_tabla(connection)
+                with connection.cursor() as cursor:
+                    self._mantener(cursor)
+                    connection.commit()
+                    self._reclamar(cursor)
+                    if time.monotonic() >= self._proxima_limpieza:
+                        self._proxima_limpieza = time.monotonic() + min(3600, self.retencion)
+                        self._limpiar_archivos(cursor)
+                        connection.commit()
+            except Exception as e:
+                if isinstance(e, pymysql.Error):
+                    # Caída de MySQL o esquema aún sin crear: se reintenta en el siguiente ciclo
+                    self.app.logger.warning("Error en el sondeo de trabajos: %s", e)
+                else:
+                    self.app.logger.exception("Error en el sondeo de trabajos")
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except pymysql.Error:
+                        pass
+                connection = None
+            time.sleep(self.intervalo)
+
+    def _mantener(self, cursor):
+        """Renueva latidos propios, propaga cancelaciones y recupera trabajos huérfanos"""
+        cursor.execute(
+            "UPDATE trabajos SET latido = NOW() WHERE worker = %s AND estado = 'ejecutando'",
+            (self.worker,)
+        )
+        with self._lock:
+            activos = dict(self._activos)
+        if activos:
+            marcadores = ', '.join(['%s'] * len(activos))
+            cursor.execute(
+                f"SELECT id FROM trabajos WHERE cancelar = 1 AND id IN ({marcadores})",
+                tuple(activos)
+            )
+            for fila in cursor.fetchall():
+                activos[fila['id']]._cancelar.set()
+
+        cursor.execute(
+            """UPDATE trabajos SET
+            estado = CASE WHEN cancelar = 1 THEN 'cancelado'
+                          WHEN intentos >= %s THEN 'fallido'
+                          ELSE 'pendiente' END,
+            error = IF(intentos >= %s AND cancelar = 0, 'El worker dejó de responder', error),
+            terminado = IF(cancelar = 1 OR intentos >= %s, NOW(), NULL),
+            worker = NULL
+            WHERE estado = 'ejecutando' AND latido < NOW() - INTERVAL %s SECOND""",
+            (self.max_intentos, self.max_intentos, self.max_intentos, self.expira)
+        )
+
+    def _reclamar(self, cursor):
+        """Toma trabajos pendientes mientras haya hilos libres en este worker"""
+        with self._lock:
+            libres = self.max_hilos - len(self._activos)
+            en_curso = Counter(contexto.tipo for contexto in self._activos.values())
+        if libres <= 0:
+            return
+        # Tipos cuyos cupos ya ocupa este mismo worker: no vale la pena intentar GET_LOCK
+        ocupados = {nombre for nombre, tipo in TIPOS.items() if en_curso[nombre] >= tipo.concurrencia}
+        sql = "SELECT id, tipo FROM trabajos WHERE estado = 'pendiente'"
+        args = []
+        if ocupados:
+            sql += f" AND tipo NOT IN ({', '.join(['%s'] * len(ocupados))})"
+            args.extend(sorted(ocupados))
+        sql += " ORDER BY id LIMIT %s"
+        args.append(libres * 4)
+        cursor.execute(sql, args)
+
+        # Una misma conexión sirve para los intentos fallidos; sólo se abre otra al tomar un trabajo
+        connection = None
+        try:
+            for candidato in cursor.fetchall():
+                if libres <= 0:
+                    break
+                tipo = TIPOS.get(candidato['tipo'])
+                if tipo is None or tipo.nombre in ocupados:
+                    continue
+                if connection is None:
+                    connection = self._conectar()
+                trabajo = self._tomar(connection, candidato['id'], tipo)
+                if trabajo is None:
+                    # Sin cupo libre en la máquina: no se insiste con este tipo hasta el próximo sondeo
+                    ocupados.add(tipo.nombre)
+                    continue
+                contexto = ContextoTrabajo(trabajo, connection)
+                connection = None
+                with self._lock:
+                    self._activos[contexto.id] = contexto
+                self._pool.submit(self._ejecutar, tipo, contexto, trabajo)
+                libres -= 1
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _tomar(self, connection, trabajo_id, tipo):
+        """
+        Obtiene un cupo del tipo (GET_LOCK) y marca el trabajo como propio, o devuelve None.
+        Si no lo toma, la conexión queda sin bloqueos y puede reutilizarse.
+        """
+        with connection.cursor() as cursor:
+            for cupo in range(tipo.concurrencia):
+                bloqueo = f"trabajos:{tipo.nombre}:{cupo}"
+                cursor.execute("SELECT GET_LOCK(%s, 0) AS ok", (bloqueo,))
+                if cursor.fetchone()['ok'] == 1:
+                    break
+            else:
+                return None
+            cursor.execute(
+                """UPDATE trabajos SET estado = 'ejecutando', worker = %s, intentos = intentos + 1,
+                iniciado = COALESCE(iniciado, NOW()), latido = NOW()
+                WHERE id = %s AND estado = 'pendiente'""",
+                (self.worker, trabajo_id)
+            )
+            connection.commit()
+            if cursor.rowcount == 0:
+                # Otro worker lo reclamó primero
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (bloqueo,))
+                return None
+            cursor.execute("SELECT * FROM trabajos WHERE id = %s", (trabajo_id,))
+            return cursor.fetchone()
+
+    def _limpiar_archivos(self, cursor):
+        """Borra los archivos de trabajos más antiguos que JOBS_RETENCION que ya nadie usará"""
+        with self.app.app_context():
+            directorio = directorio_archivos()
+        limite = time.time() - self.retencion
+        for nombre in os.listdir(directorio):
+            if not nombre.startswith(('import_', 'productos_')):
+                continue
+            ruta = os.path.join(directorio, nombre)
+            try:
+                if os.path.getmtime(ruta) > limite:
+                    continue
+                if nombre.startswith('import_'):
+                    # Una subida sigue en uso mientras su importación no haya terminado
+                    cursor.execute(
+                        """SELECT 1 FROM trabajos WHERE estado IN ('pendiente', 'ejecutando')
+                        AND tipo = 'importar_productos' AND parametros LIKE %s LIMIT 1""",
+                        (f"%{nombre}%",)
+                    )
+                    if cursor.fetchone():
+                        continue
+                os.remove(ruta)
+            except FileNotFoundError:
+                # Otro worker de la máquina lo borró primero
+                continue
+
+    def _terminar(self, contexto, estado, resultado=None, error=None):
+        connection = contexto.connection
+        if not connection.open:
+            connection = contexto.connection = self._conectar()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """UPDATE trabajos SET estado = %s, resultado = %s, error = %s,
+                terminado = IF(%s = 'pendiente', NULL, NOW()),
+                progreso = IF(%s = 'completado', 100, progreso), worker = NULL
+                WHERE id = %s AND worker = %s""",
+                (estado, None if resultado is None else json.dumps(resultado, ensure_ascii=False, default=str),
+                 error, estado, estado, contexto.id, self.worker)
+            )
+        connection.commit()
+
+    def _ejecutar(self, tipo, contexto, trabajo):
+        connection = contexto.connection
+        try:
+            with self.app.app_context():
+                try:
+                    parametros = json.loads(trabajo['parametros'] or '{}')
+                    resultado = tipo.funcion(contexto, connection, parametros)
+                    estado, error = 'completado', None
+                except TrabajoCancelado:
+                    estado, resultado, error = 'cancelado', None, None
+                except TrabajoReintentable as e:
+                    self.app.logger.warning("Trabajo %s (%s) interrumpido: %s", contexto.id, tipo.nombre, e)
+                    estado = 'pendiente' if trabajo['intentos'] < self.max_intentos else 'fallido'
+                    resultado, error = None, str(e)
+                except Exception as e:
+                    self.app.logger.exception("Trabajo %s (%s) falló", contexto.id, tipo.nombre)
+                    estado, resultado, error = 'fallido', None, str(e)
+                if connection.open:
+                    connection.rollback()
+                self._terminar(contexto, estado, resultado, error)
+        except Exception:
+            self.app.logger.exception("No se pudo registrar el fin del trabajo %s", contexto.id)
+        finally:
+            with self._lock:
+                self._activos.pop(contexto.id, None)
+            # Cerrar la conexión libera también el cupo tomado con GET_LOCK
+            try:
+                contexto.connection.close()
+            except pymysql.Error:
+                pass
+
+
+def get_ejecutor():
+    return current_app.extensions['trabajos']
+
+
+def _iniciar_ejecutor():
+    get_ejecutor().iniciar()
+
+
+def iniciar(app):
+    """Arranca el ejecutor de la app (llamado desde el hook post_worker_init de gunicorn)"""
+    if app.config['JOBS_HABILITADOS']:
+        app.extensions['trabajos'].iniciar()
+
+
+@trabajos_cli.command('init')
+def init_command():
+    """Crea la tabla trabajos si no existe."""
+    connection = get_db_connection()
+    try:
+        asegurar_tabla(connection)
+    finally:
+        connection.close()
+    click.echo("Tabla trabajos lista")
+
+
+def init_app(app):
+    """Registra el ejecutor de trabajos y el comando `flask trabajos` en la app"""
+    app.extensions['trabajos'] = Ejecutor(app)
+    app.cli.add_command(trabajos_cli)
+    if app.config['JOBS_HABILITADOS']:
+        # Con gunicorn arranca en post_worker_init; esto es el respaldo sin gunicorn (flask run,
+        # run_gevent.py), donde arranca con la primera petición
+        app.before_request(_iniciar_ejecutor)
+    # Registra los tipos de trabajo incluidos en la app
+    from . import tareas  # noqa: F401
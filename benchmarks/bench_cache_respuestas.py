@@ -0,0 +1,104 @@
+# Propósito: Mide el efecto de la caché de respuestas en las rutas GET más consultadas.
+# Funcionalidad: Con el cliente de pruebas de Flask reparte N peticiones entre GET /categorias/,
+# GET /productos/ y GET /productos/<id> (ids con distribución sesgada, como el tráfico real),
+# intercalando un PUT de producto cada --escrituras peticiones para ejercitar la invalidación.
+# Lo ejecuta con la caché deshabilitada y habilitada y reporta peticiones/s, consultas a MySQL,
+# tasa de aciertos y memoria usada por la caché.
+# Requiere una base MySQL accesible con las variables MYSQL_* habituales y productos cargados.
+# ATENCIÓN: reescribe productos (con sus mismos valores); usar contra una base de pruebas.
+# Uso: python benchmarks/bench_cache_respuestas.py --peticiones 5000 --escrituras 200
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault('JOBS_HABILITADOS', 'false')
+os.environ.setdefault('ACCESS_LOG', 'false')
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.db import get_db_connection  # noqa: E402
+from app.cache_respuestas import CacheRespuestas  # noqa: E402
+
+
+def contar_consultas():
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Com_select'")
+            return int(cursor.fetchone()['Value'])
+    finally:
+        connection.close()
+
+
+def ejecutar(app, habilitada, args):
+    app.extensions['cache_respuestas'] = CacheRespuestas(
+        max_bytes=args.max_mb * 1024 * 1024, ttl=args.ttl
+    ) if habilitada else None
+    with app.app_context():
+        token = create_access_token(identity='1')
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id, nombre, precio, descripcion, categoria_id FROM productos LIMIT 1000")
+                productos = cursor.fetchall()
+        finally:
+            connection.close()
+        consultas_inicio = contar_consultas()
+
+    cliente = app.test_client()
+    encabezados = {'Authorization': f'Bearer {token}', 'Accept-Encoding': 'gzip'}
+    rng = random.Random(7)
+    inicio = time.perf_counter()
+    for i in range(args.peticiones):
+        if args.escrituras and i % args.escrituras == 0:
+            producto = rng.choice(productos)
+            # Se envían todos los campos actuales: la ruta guarda '' si falta la descripción
+            cliente.put(f"/productos/{producto['id']}", headers=encabezados, json={
+                "nombre": producto['nombre'], "precio": float(producto['precio'] or 0),
+                "descripcion": producto['descripcion'] or '',
+                "categoria": {"id": producto['categoria_id']},
+            })
+            continue
+        ruta = rng.random()
+        if ruta < 0.2:
+            cliente.get('/categorias/', headers=encabezados)
+        elif ruta < 0.3:
+            cliente.get('/productos/', headers=encabezados)
+        else:
+            # Unos pocos productos concentran la mayoría de las lecturas
+            indice = min(int(rng.paretovariate(1.2)) - 1, len(productos) - 1)
+            cliente.get(f"/productos/{productos[indice]['id']}", headers=encabezados)
+    total = time.perf_counter() - inicio
+
+    with app.app_context():
+        consultas = contar_consultas() - consultas_inicio
+    print(f"caché {'habilitada' if habilitada else 'deshabilitada':<14} "
+          f"{args.peticiones / total:8.0f} peticiones/s  {consultas:7d} SELECT")
+    if habilitada:
+        stats = app.extensions['cache_respuestas'].estadisticas()
+        print(f"  tasa de aciertos={stats['tasa_aciertos']:.1%}  entradas={stats['entradas']}  "
+              f"memoria={stats['bytes'] / 1024:.0f} KiB  expulsiones={stats['expulsiones']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--peticiones', type=int, default=5000)
+    parser.add_argument('--escrituras', type=int, default=200, help='Un PUT cada N peticiones (0: ninguno)')
+    parser.add_argument('--ttl', type=float, default=10)
+    parser.add_argument('--max-mb', type=int, default=32)
+    args = parser.parse_args()
+
+    app = create_app()
+    ejecutar(app, False, args)
+    ejecutar(app, True, args)
+
+
+if __name__ == '__main__':
+    main()
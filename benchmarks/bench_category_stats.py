@@ -0,0 +1,69 @@
+# Propósito: Compara el costo de GET /categorias/stats servido desde categoria_stats frente a
+# la agregación ingenua con GROUP BY sobre toda la tabla productos.
+# Funcionalidad: Ejecuta ambas consultas N veces contra la base configurada (variables MYSQL_*)
+# y reporta la latencia media y p95 de cada estrategia. Ejecutar antes `flask stats rebuild`.
+# Uso: python benchmarks/bench_category_stats.py --iteraciones 200
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, estadisticas  # noqa: E402
+from app.db import get_db_connection  # noqa: E402
+
+NAIVE_SQL = """SELECT c.id, c.nombre, COUNT(p.id) AS total, MIN(p.precio) AS min_precio,
+    AVG(p.precio) AS avg_precio, MAX(p.precio) AS max_precio
+    FROM categoria c LEFT JOIN productos p ON p.categoria_id = c.id
+    GROUP BY c.id, c.nombre"""
+
+NAIVE_ULTIMOS_SQL = """SELECT id, nombre, precio, categoria_id FROM (
+    SELECT id, nombre, precio, categoria_id,
+    ROW_NUMBER() OVER (PARTITION BY categoria_id ORDER BY id DESC) AS n
+    FROM productos) t WHERE n <= %s"""
+
+
+def medir(nombre, funcion, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    print(f"{nombre:<26} media={statistics.mean(tiempos) * 1000:8.2f} ms  "
+          f"p95={tiempos[int(len(tiempos) * 0.95) - 1] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iteraciones', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) AS n FROM productos")
+                print(f"productos: {cursor.fetchone()['n']}")
+
+                def ingenua():
+                    cursor.execute(NAIVE_SQL)
+                    cursor.fetchall()
+                    cursor.execute(NAIVE_ULTIMOS_SQL, (estadisticas.ULTIMOS_N,))
+                    cursor.fetchall()
+
+                def resumen():
+                    estadisticas.obtener_todas(cursor)
+
+                medir('GROUP BY sobre productos', ingenua, args.iteraciones)
+                medir('categoria_stats', resumen, args.iteraciones)
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# Propósito: Mide el efecto de ?fields= (SELECT con columnas explícitas) en una tabla grande.
+# Funcionalidad: Crea la tabla temporal productos_bench con N filas (100k por defecto) y
+# descripciones realistas de ~1 KB, y compara `SELECT *` con `SELECT id, nombre, precio`:
+# bytes enviados por MySQL (Bytes_sent de la sesión), tiempo de consulta + construcción de
+# dicts y tamaño/tiempo de la serialización JSON de la respuesta.
+# Uso: python benchmarks/bench_fields.py --filas 100000
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.campos import lista_select  # noqa: E402
+from app.db import get_db_connection  # noqa: E402
+
+PALABRAS = ("pantalla", "batería", "resolución", "garantía", "diseño", "ligero", "resistente",
+            "incluye", "cargador", "conectividad", "inalámbrico", "memoria", "almacenamiento",
+            "acabado", "premium", "ideal", "para", "uso", "diario", "con", "de", "y", "alta")
+
+
+def descripcion(rng, tamano=1000):
+    palabras = []
+    while sum(len(p) + 1 for p in palabras) < tamano:
+        palabras.append(rng.choice(PALABRAS))
+    return ' '.join(palabras).capitalize() + '.'
+
+
+def preparar(cursor, connection, filas):
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS productos_bench")
+    cursor.execute(
+        """CREATE TEMPORARY TABLE productos_bench (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(50) NOT NULL,
+        precio DECIMAL(8,2) NULL,
+        descripcion TEXT NULL,
+        categoria_id INT NULL,
+        nombre_categoria VARCHAR(50) NULL)"""
+    )
+    rng = random.Random(42)
+    lote = []
+    for i in range(filas):
+        lote.append((f"Producto {i}", round(rng.uniform(5, 2000), 2), descripcion(rng),
+                     rng.randint(1, 20), f"Categoría {rng.randint(1, 20)}"))
+        if len(lote) == 5000:
+            cursor.executemany(
+                """INSERT INTO productos_bench
+                (nombre, precio, descripcion, categoria_id, nombre_categoria)
+                VALUES (%s, %s, %s, %s, %s)""", lote)
+            lote = []
+    if lote:
+        cursor.executemany(
+            """INSERT INTO productos_bench
+            (nombre, precio, descripcion, categoria_id, nombre_categoria)
+            VALUES (%s, %s, %s, %s, %s)""", lote)
+    connection.commit()
+
+
+def bytes_enviados(cursor):
+    cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+    return int(cursor.fetchone()['Value'])
+
+
+def medir(app, cursor, nombre, columnas):
+    antes = bytes_enviados(cursor)
+    inicio = time.perf_counter()
+    cursor.execute(f"SELECT {columnas} FROM productos_bench")
+    filas = cursor.fetchall()
+    consulta = time.perf_counter() - inicio
+    leidos = bytes_enviados(cursor) - antes
+
+    inicio = time.perf_counter()
+    cuerpo = app.json.dumps(filas)
+    serializacion = time.perf_counter() - inicio
+    print(f"{nombre:<30} MySQL={leidos / 1e6:8.2f} MB  consulta+dicts={consulta * 1000:8.1f} ms  "
+          f"JSON={len(cuerpo) / 1e6:8.2f} MB en {serializacion * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, default=100_000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                print(f"Generando {args.filas} filas...")
+                preparar(cursor, connection, args.filas)
+                medir(app, cursor, "SELECT *", "*")
+                medir(app, cursor, "?fields=id,nombre,precio", lista_select(['id', 'nombre', 'precio']))
+                cursor.execute("DROP TEMPORARY TABLE productos_bench")
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
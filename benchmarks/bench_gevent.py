@@ -0,0 +1,114 @@
+# Propósito: Compara la concurrencia de workers sync/gthread frente a workers gevent.
+# Funcionalidad: Lanza gunicorn dos veces con el mismo número de workers (mismo presupuesto de
+# memoria): primero con la configuración actual del Procfile (--workers 4 --threads 2) y luego
+# con --worker-class gevent. En ambos casos golpea con N clientes concurrentes una ruta que espera
+# a MySQL (SELECT SLEEP) a través del pool de app/db.py y reporta peticiones/s, latencia p50/p95
+# y la memoria RSS total de los workers.
+#
+# Requiere una base MySQL accesible con las variables MYSQL_* habituales.
+# Uso: python benchmarks/bench_gevent.py --clients 64 --requests 640 --sleep 0.05
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if os.getenv('BENCH_GEVENT') == '1':
+    from gevent import monkey
+    monkey.patch_all()
+
+sys.path.insert(0, str(ROOT))
+
+from app import create_app  # noqa: E402
+from app.db import get_db_connection  # noqa: E402
+
+app = create_app()
+
+
+@app.route('/bench/db')
+def bench_db():
+    """Simula una consulta lenta para medir cuántas esperas a MySQL caben en paralelo"""
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT SLEEP(%s) AS s", (float(os.getenv('BENCH_SLEEP', '0.05')),))
+            cursor.fetchone()
+    finally:
+        connection.close()
+    return {"ok": True}
+
+
+def workers_rss_kb(master_pid):
+    """Suma la memoria RSS (kB) de los procesos hijos del master de gunicorn"""
+    children = Path(f'/proc/{master_pid}/task/{master_pid}/children').read_text().split()
+    total = 0
+    for pid in children:
+        for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                total += int(line.split()[1])
+    return total
+
+
+def run_scenario(name, gunicorn_args, env, args):
+    port = str(args.port)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', '4',
+         *gunicorn_args, 'benchmarks.bench_gevent:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}/bench/db'
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(url, timeout=5).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{name}: gunicorn no respondió')
+                time.sleep(0.2)
+
+        def one(_):
+            start = time.perf_counter()
+            urllib.request.urlopen(url, timeout=60).read()
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            latencies = sorted(executor.map(one, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        rss_mb = workers_rss_kb(proc.pid) / 1024
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"{name:<28} {args.requests / elapsed:8.1f} req/s  "
+          f"p50={statistics.median(latencies) * 1000:7.1f} ms  "
+          f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms  "
+          f"RSS workers={rss_mb:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=640)
+    parser.add_argument('--sleep', type=float, default=0.05)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    base_env = dict(os.environ, BENCH_SLEEP=str(args.sleep), DB_POOL_MAX=str(args.clients))
+    run_scenario('sync (4 workers x 2 hilos)', ['--threads', '2'], base_env, args)
+    run_scenario('gevent (4 workers)',
+                 ['--worker-class', 'gevent', '--worker-connections', str(args.clients)],
+                 dict(base_env, BENCH_GEVENT='1'), args)
+
+
+if __name__ == '__main__':
+    main()
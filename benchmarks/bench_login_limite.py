@@ -0,0 +1,75 @@
+# Propósito: Mide el costo que añade el limitador de /auth/login a un inicio de sesión normal.
+# Funcionalidad: Ejecuta LimitadorLogin.consumir() (dos cubetas: número e IP) en el camino feliz,
+# primero en un solo proceso y luego con varios procesos compartiendo el mismo archivo SQLite
+# (como los workers de gunicorn), y lo compara con una verificación bcrypt, que es el trabajo
+# que el limitador evita en los intentos rechazados. No requiere MySQL.
+# Uso: python benchmarks/bench_login_limite.py --intentos 20000 --procesos 4
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bcrypt  # noqa: E402
+
+from app.limite_login import Cubeta, LimitadorLogin  # noqa: E402
+
+
+def limitador(ruta):
+    # Capacidad alta: se mide el camino feliz, donde todos los intentos se permiten
+    return LimitadorLogin(ruta, por_numero=Cubeta(10**9, 300), por_ip=Cubeta(10**9, 300))
+
+
+def medir(args):
+    ruta, intentos, semilla = args
+    lim = limitador(ruta)
+    tiempos = []
+    for i in range(intentos):
+        inicio = time.perf_counter()
+        lim.consumir({'numero': f"n:{semilla}-{i % 500}", 'ip': f"ip:10.0.{semilla}.{i % 250}"})
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def reportar(nombre, tiempos, total):
+    tiempos.sort()
+    print(f"{nombre:<28} {len(tiempos) / total:10.0f} intentos/s  "
+          f"p50={statistics.median(tiempos) * 1e6:7.1f} µs  "
+          f"p99={tiempos[int(len(tiempos) * 0.99)] * 1e6:7.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--intentos', type=int, default=20000)
+    parser.add_argument('--procesos', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'login_limite.sqlite3')
+
+        inicio = time.perf_counter()
+        tiempos = medir((ruta, args.intentos, 0))
+        reportar("1 proceso", tiempos, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        with Pool(args.procesos) as pool:
+            partes = pool.map(medir, [(ruta, args.intentos // args.procesos, p + 1)
+                                      for p in range(args.procesos)])
+        reportar(f"{args.procesos} procesos (mismo archivo)",
+                 [t for parte in partes for t in parte], time.perf_counter() - inicio)
+
+    hashed = bcrypt.hashpw(b"contrasena", bcrypt.gensalt())
+    inicio = time.perf_counter()
+    for _ in range(5):
+        bcrypt.checkpw(b"incorrecta", hashed)
+    print(f"{'bcrypt.checkpw (referencia)':<28} {(time.perf_counter() - inicio) / 5 * 1e3:10.1f} ms por intento")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Propósito: Compara las dos estrategias para productos.nombre_categoria.
+# Funcionalidad: 'copia' lee el nombre guardado en productos pero paga un UPDATE por lotes de
+# todos los productos de la categoría al renombrarla; 'lectura' no escribe nada al renombrar
+# pero resuelve el nombre al leer (caché de categorías o JOIN). Mide la lectura completa de
+# productos con cada estrategia y el costo de renombrar la categoría con más productos.
+# ATENCIÓN: renombra (y restaura) una categoría; usar contra una base de pruebas.
+# Uso: python benchmarks/bench_nombre_categoria.py --iteraciones 50 --lote 1000
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, propagacion  # noqa: E402
+from app.cache_categorias import get_cache, resolver_nombres  # noqa: E402
+from app.db import get_db_connection  # noqa: E402
+
+JOIN_SQL = """SELECT p.id, p.nombre, p.precio, p.descripcion, p.categoria_id,
+    c.nombre AS nombre_categoria
+    FROM productos p LEFT JOIN categoria c ON c.id = p.categoria_id"""
+
+
+def medir(nombre, funcion, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"{nombre:<34} media={statistics.mean(tiempos) * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iteraciones', type=int, default=50)
+    parser.add_argument('--lote', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                def leer_copia():
+                    cursor.execute("SELECT * FROM productos")
+                    cursor.fetchall()
+
+                def leer_cache():
+                    cursor.execute("SELECT * FROM productos")
+                    resolver_nombres(cursor.fetchall(), cursor)
+
+                def leer_join():
+                    cursor.execute(JOIN_SQL)
+                    cursor.fetchall()
+
+                print("-- Lectura de GET /productos/")
+                medir('copia (SELECT *)', leer_copia, args.iteraciones)
+                get_cache().cargar(cursor)
+                medir('lectura (caché de categorías)', leer_cache, args.iteraciones)
+                medir('lectura (JOIN)', leer_join, args.iteraciones)
+
+                cursor.execute(
+                    """SELECT c.id, c.nombre, COUNT(*) AS n FROM productos p
+                    JOIN categoria c ON c.id = p.categoria_id
+                    GROUP BY c.id, c.nombre ORDER BY n DESC LIMIT 1"""
+                )
+                categoria = cursor.fetchone()
+            if not categoria:
+                print("No hay productos con categoría; se omite la medición de renombre")
+                return
+
+            print(f"-- Renombre de la categoría {categoria['id']} ({categoria['n']} productos)")
+            for nombre in (categoria['nombre'] + ' (bench)', categoria['nombre']):
+                with connection.cursor() as cursor:
+                    cursor.execute("UPDATE categoria SET nombre = %s WHERE id = %s",
+                                   (nombre, categoria['id']))
+                connection.commit()
+                inicio = time.perf_counter()
+                filas = propagacion.propagar_renombre(connection, categoria['id'], nombre, args.lote)
+                print(f"copia: propagar a {filas} productos   {(time.perf_counter() - inicio) * 1000:9.2f} ms")
+            print("lectura: sin escrituras en productos (sólo se invalida la caché)")
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# Propósito: Simula una estampida (thundering herd) sobre GET /productos/ y GET /categorias/.
+# Funcionalidad: Lanza N hilos que esperan en una barrera y piden a la vez las mismas consultas
+# de lectura mediante db.leer_compartido(), como ocurre tras un deploy o al vencer la caché.
+# Se ejecuta con la coalescencia deshabilitada y habilitada y reporta cuántas consultas llegaron
+# a MySQL (Com_select del servidor y ejecuciones del single-flight) y la latencia p50/p95.
+# Requiere una base MySQL accesible con las variables MYSQL_* habituales.
+# Uso: python benchmarks/bench_single_flight.py --clientes 50 --rondas 5
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault('JOBS_HABILITADOS', 'false')
+os.environ.setdefault('ACCESS_LOG', 'false')
+
+from app import create_app  # noqa: E402
+from app import db  # noqa: E402
+from app.db import SingleFlight, get_db_connection, leer_compartido  # noqa: E402
+
+CONSULTAS = ("SELECT * FROM productos", "SELECT * FROM categoria")
+
+
+def com_select():
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Com_select'")
+            return int(cursor.fetchone()['Value'])
+    finally:
+        connection.close()
+
+
+def ejecutar(app, habilitada, args):
+    vuelos = SingleFlight(args.plazo) if habilitada else None
+    app.extensions['db_vuelos'] = vuelos
+    latencias = []
+    lock = threading.Lock()
+
+    def cliente(barrera, sql):
+        with app.app_context():
+            barrera.wait()
+            inicio = time.perf_counter()
+            leer_compartido(sql)
+            with lock:
+                latencias.append(time.perf_counter() - inicio)
+
+    with app.app_context():
+        antes = com_select()
+    for _ in range(args.rondas):
+        barrera = threading.Barrier(args.clientes)
+        hilos = [threading.Thread(target=cliente, args=(barrera, CONSULTAS[i % len(CONSULTAS)]))
+                 for i in range(args.clientes)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    with app.app_context():
+        consultas = com_select() - antes
+
+    latencias.sort()
+    print(f"single-flight {'habilitado' if habilitada else 'deshabilitado':<14} "
+          f"{args.clientes * args.rondas:5d} lecturas -> {consultas:5d} SELECT en MySQL  "
+          f"p50={statistics.median(latencias) * 1000:7.1f} ms  "
+          f"p95={latencias[int(len(latencias) * 0.95)] * 1000:7.1f} ms")
+    if vuelos is not None:
+        print(f"  ejecutadas={vuelos.ejecutadas}  compartidas={vuelos.compartidas}  vencidas={vuelos.vencidas}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--plazo', type=float, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    # El pool debe admitir a todos los clientes para que la comparación no la limite el pool
+    app.config['DB_POOL_MAX'] = args.clientes + 1
+    db.init_app(app)
+    ejecutar(app, False, args)
+    ejecutar(app, True, args)
+
+
+if __name__ == '__main__':
+    main()
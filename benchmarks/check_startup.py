@@ -0,0 +1,86 @@
+# Propósito: Verifica que el arranque en frío del worker se mantenga dentro de un presupuesto.
+# Funcionalidad: Lanza un intérprete nuevo con `python -X importtime` que importa app y llama a
+# create_app(), como hace gunicorn al iniciar cada worker. Mide el tiempo total (importación +
+# create_app), lista las importaciones más costosas según -X importtime y comprueba que los
+# módulos que se cargan de forma diferida (bcrypt, sqlite3, gzip, ...) no se importen al
+# arrancar. Repite la medición varias veces y usa la mejor para reducir el ruido.
+# Termina con código 1 si se supera el presupuesto o se carga un módulo diferido, así que puede
+# usarse como verificación en CI o antes de desplegar.
+# Uso: python benchmarks/check_startup.py --presupuesto-ms 600 --repeticiones 5
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que la app sólo importa en su primer uso
+DIFERIDOS = ('bcrypt', 'sqlite3', 'gzip', 'concurrent.futures')
+
+PROGRAMA = f"""
+import json, sys, time
+inicio = time.perf_counter()
+from app import create_app
+importado = time.perf_counter()
+create_app()
+fin = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (importado - inicio) * 1000,
+    "create_app_ms": (fin - importado) * 1000,
+    "diferidos_cargados": [m for m in {DIFERIDOS!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir():
+    """Arranca un intérprete nuevo y devuelve (tiempos, líneas de -X importtime)"""
+    entorno = dict(os.environ, LOG_LEVEL='WARNING')
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROGRAMA],
+        cwd=ROOT, env=entorno, capture_output=True, text=True, check=True
+    )
+    salida = proceso.stdout.strip().splitlines()[-1]
+    return json.loads(salida), [l for l in proceso.stderr.splitlines() if l.startswith('import time:')]
+
+
+def importaciones_costosas(lineas, cantidad):
+    """Módulos importados al arrancar ordenados por tiempo acumulado"""
+    filas = []
+    for linea in lineas[1:]:
+        _, propio, acumulado, nombre = (parte.strip() for parte in linea.replace('import time:', '|').split('|'))
+        filas.append((int(acumulado), int(propio), nombre))
+    return sorted(filas, reverse=True)[:cantidad]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--presupuesto-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', '600')))
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    mediciones = [medir() for _ in range(args.repeticiones)]
+    tiempos, lineas = min(mediciones, key=lambda m: m[0]['import_ms'] + m[0]['create_app_ms'])
+    total = tiempos['import_ms'] + tiempos['create_app_ms']
+
+    print(f"{'acumulado':>10} {'propio':>8}  módulo (mejor de {args.repeticiones}, en µs)")
+    for acumulado, propio, nombre in importaciones_costosas(lineas, args.top):
+        print(f"{acumulado:10d} {propio:8d}  {nombre}")
+    print(f"\nimportación={tiempos['import_ms']:.1f} ms  create_app={tiempos['create_app_ms']:.1f} ms  "
+          f"total={total:.1f} ms  presupuesto={args.presupuesto_ms:.0f} ms")
+
+    errores = []
+    if total > args.presupuesto_ms:
+        errores.append(f"el arranque tardó {total:.1f} ms (presupuesto {args.presupuesto_ms:.0f} ms)")
+    if tiempos['diferidos_cargados']:
+        errores.append(f"módulos diferidos cargados al arrancar: {', '.join(tiempos['diferidos_cargados'])}")
+    for error in errores:
+        print(f"ERROR: {error}", file=sys.stderr)
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
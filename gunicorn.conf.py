@@ -0,0 +1,24 @@
+# Propósito: Configuración de gunicorn leída automáticamente desde el directorio de trabajo.
+# Funcionalidad: Permite elegir el tipo de worker por variable de entorno sin cambiar el Procfile.
+# WORKER_CLASS=sync (por defecto) mantiene el comportamiento actual; WORKER_CLASS=gevent activa
+# workers cooperativos, donde WORKER_CONNECTIONS limita las peticiones simultáneas por worker.
+# Con gevent conviene subir DB_POOL_MAX para que el pool no sea el cuello de botella.
+# post_worker_init arranca el calentamiento que espera /health/ready (ver app/calentamiento.py) y
+# el ejecutor de trabajos en segundo plano (ver app/trabajos.py), sin esperar a la primera petición.
+
+import os
+
+worker_class = os.getenv('WORKER_CLASS', 'sync')
+
+if worker_class == 'gevent':
+    worker_connections = int(os.getenv('WORKER_CONNECTIONS', '200'))
+
+
+def post_worker_init(worker):
+    """
+    Calienta el worker (pool, cachés, swagger) y arranca su ejecutor de trabajos en cuanto
+    arranca, antes de la primera petición
+    """
+    from app import calentamiento, trabajos
+    calentamiento.iniciar(worker.wsgi)
+    trabajos.iniciar(worker.wsgi)
@@ -0,0 +1,18 @@
+# Propósito: Punto de entrada alternativo para ejecutar la aplicación con workers cooperativos (gevent).
+# Funcionalidad: Aplica el monkey-patching de gevent ANTES de importar Flask, PyMySQL o cualquier
+# otro módulo de la app, de modo que los sockets de PyMySQL, queue y threading (usados por el pool
+# de app/db.py) cedan el control entre greenlets durante la espera de E/S. Así cada worker puede
+# atender cientos de peticiones concurrentes que esperan a MySQL en lugar de 2 hilos.
+#
+# Uso (gunicorn):
+#   gunicorn --worker-class gevent --workers 4 --worker-connections 200 run_gevent:app
+# o bien con el Procfile actual exportando WORKER_CLASS=gevent (ver gunicorn.conf.py).
+
+from gevent import monkey
+
+monkey.patch_all()
+
+# Importa la función para crear la aplicación desde el módulo app (después del parcheo)
+from app import create_app  # noqa: E402
+
+app = create_app()